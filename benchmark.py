@@ -0,0 +1,271 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+import game
+
+
+class Scenario:
+    """
+    A stage of the game that the benchmarks time, given as a timeline whose last stage lasts longer than the benchmark
+    The game is warmed up first so that the screen has items on it
+    """
+    def __init__(self, name, stages, event, warmup_frames):
+        self._name = name
+        self._timeline_config = {"stages": stages, "events": [event]}
+        self._warmup_frames = warmup_frames
+
+    # Getters
+    def get_name(self):
+        return self._name
+
+    def get_timeline(self):
+        return game.Timeline(self._timeline_config)
+
+    # Functions
+    def warm_up(self, controller):
+        scheduler = controller.get_scheduler()
+        for i in range(self._warmup_frames):
+            scheduler.run_frame()
+
+
+# Seconds that the timed stage of each scenario lasts
+HOLD = 100000
+
+# Steady normal stage, dense recess bursts, a transition where the items of a normal stage leave and nothing spawns,
+# and a full item store
+NORMAL = Scenario("normal", [{"stage": "Normal", "duration": HOLD, "spawn_rate": 50, "items": "normal"}], {"event": "Rhino"}, 300)
+RECESS = Scenario("recess", [{"stage": "Event", "duration": HOLD, "spawn_rate": 10, "items": "event"}], {"event": "Recess", "items": "bonus"}, 300)
+TRANSITION = Scenario("transition", [
+    {"stage": "Normal", "duration": 2.5, "spawn_rate": 50, "items": "normal"},
+    {"stage": "NormalTransition", "duration": HOLD, "spawn_rate": 1}
+], {"event": "Mid Terms"}, 300)
+FULL = Scenario("full", [{"stage": "Normal", "duration": HOLD, "spawn_rate": 1, "items": "normal"}], {"event": "Rhino"}, 400)
+SCENARIOS = [NORMAL, RECESS, TRANSITION, FULL]
+
+
+def summarise(samples):
+    # Nanoseconds per call: median, 95th and 99th percentile, mean and min
+    samples = sorted(samples)
+    count = len(samples)
+    return {
+        "median_ns": samples[count // 2],
+        "p95_ns": samples[min(count - 1, int(0.95 * count))],
+        "p99_ns": samples[min(count - 1, int(0.99 * count))],
+        "mean_ns": sum(samples) / count,
+        "min_ns": samples[0],
+        "samples": count
+    }
+
+
+def time_calls(function, number, repeat, setup=None):
+    # Runs the function number times in each of repeat rounds, setup is run before each round and not timed
+    # Returns the nanoseconds per call of each round
+    samples = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        # Like timeit, garbage collection is turned off while timing so it does not land in a random round
+        gc.disable()
+        start_time = time.perf_counter_ns()
+        for j in range(number):
+            function()
+        samples.append((time.perf_counter_ns() - start_time) / number)
+        gc.enable()
+    return samples
+
+
+def measure(function, number, repeat, setup=None):
+    return summarise(time_calls(function, number, repeat, setup))
+
+
+def new_game(backend, scenario, seed):
+    # A game set up but not started, warmed up in the scenario
+    if isinstance(backend, game.TurtleBackend):
+        # Remove the turtles of the previous scenario
+        backend.create_screen().clear()
+    controller = game.GameController("Male", backend, seed)
+    controller.set_timeline(scenario.get_timeline())
+    controller.set_up_game()
+    controller.get_scheduler().start()
+    scenario.warm_up(controller)
+    return controller
+
+
+def benchmark_frames(controller, frames, passes=5):
+    # Frames are timed in several passes, the fastest median of a pass is compared as it is least affected by other programs
+    scheduler = controller.get_scheduler()
+    samples = []
+    pass_medians = []
+    for i in range(passes):
+        pass_samples = time_calls(scheduler.run_frame, 1, max(frames // passes, 1))
+        pass_medians.append(summarise(pass_samples)["median_ns"])
+        samples += pass_samples
+    result = summarise(samples)
+    result["best_median_ns"] = min(pass_medians)
+    result["items"] = controller.get_item_store().get_count()
+    return result
+
+
+def benchmark_spawn(controller, repeat):
+    # Items are spawned in rounds that fit in the item store, the store is emptied between rounds
+    item_store = controller.get_item_store()
+    result = measure(controller.spawn_random_item, 50, repeat, item_store.clear)
+    item_store.clear()
+    return result
+
+
+def benchmark_items(controller, repeat):
+    # The item store calls run by the game every tick, over every item at once
+    # Every round starts from a snapshot of the game, so each round moves and checks the same items from the same places
+    snapshot = game.GameSnapshot(controller.save_snapshot())
+    item_store = controller.get_item_store()
+
+    def restore():
+        controller.restore_snapshot(snapshot)
+
+    results = {}
+    for name, function in (("item_store_move_items", item_store.move_items), ("item_store_check_collisions", item_store.check_collisions)):
+        result = measure(function, 1, repeat, restore)
+        result["items"] = len(snapshot.get_items())
+        results[name] = result
+    restore()
+    return results
+
+
+def benchmark_hud(controller, repeat):
+    # Every call changes one stat so the HUD text has to be changed
+    game_stats = controller.get_game_stats()
+
+    def change_stat():
+        game_stats["Grades"] = 1 - game_stats["Grades"]
+        controller.update_hud()
+
+    return measure(change_stat, 10, repeat)
+
+
+def run_benchmarks(backend_name, backend, frames, repeat, seed):
+    results = {}
+    for scenario in SCENARIOS:
+        controller = new_game(backend, scenario, seed)
+        name = scenario.get_name()
+        results[f"{backend_name}/{name}/frame"] = benchmark_frames(controller, frames)
+        if scenario is FULL:
+            for op_name, result in benchmark_items(controller, repeat).items():
+                results[f"{backend_name}/{name}/{op_name}"] = result
+            results[f"{backend_name}/{name}/update_hud"] = benchmark_hud(controller, repeat)
+            results[f"{backend_name}/{name}/draw_sprites"] = measure(controller.draw_sprites, 10, repeat)
+        elif scenario is not TRANSITION:
+            # Nothing spawns in the transition stage
+            results[f"{backend_name}/{name}/spawn_random_item"] = benchmark_spawn(controller, repeat)
+        print(f"  {backend_name}/{name}: {results[f'{backend_name}/{name}/frame']['median_ns'] / 1e3:.1f} us per frame")
+    return results
+
+
+def start_virtual_display():
+    # Starts Xvfb if there is no display and returns its process
+    # Returns None if there already is a display, or False if there is no display and Xvfb is not installed
+    if os.environ.get("DISPLAY"):
+        return None
+    if shutil.which("Xvfb") is None:
+        return False
+    process = subprocess.Popen(["Xvfb", ":99", "-screen", "0", "1280x720x24"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = ":99"
+    time.sleep(1)
+    return process
+
+
+def compare(results, baseline, tolerance):
+    # Prints the change in median time against the baseline, returns the frame benchmarks that got slower than allowed
+    # Frames are compared by the fastest median of a pass, everything else by the median of all rounds
+    regressions = []
+    if baseline.get("numpy") != results["numpy"]:
+        print("Warning: the baseline was run with NumPy " + ("available" if baseline.get("numpy") else "missing"))
+    print(f"{'benchmark':<45}{'baseline us':>14}{'current us':>14}{'change':>10}")
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        key = "best_median_ns" if "best_median_ns" in result else "median_ns"
+        old_time = baseline["benchmarks"][name].get(key, 0)
+        new_time = result[key]
+        change = new_time / old_time - 1 if old_time else 0
+        flag = ""
+        if change > tolerance:
+            flag = " SLOWER"
+            if name.endswith("/frame"):
+                regressions.append(name)
+        print(f"{name:<45}{old_time / 1e3:>14.2f}{new_time / 1e3:>14.2f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the spawning, movement, collision and drawing of the game")
+    parser.add_argument("--output", default="benchmark_results.json", help="file the results are saved to")
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="results of an earlier run to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--frames", type=int, default=600, help="frames timed in each scenario")
+    parser.add_argument("--repeat", type=int, default=200, help="rounds timed for each function")
+    parser.add_argument("--seed", type=int, default=1, help="random seed of every game")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed increase in median frame time before failing")
+    parser.add_argument("--no-turtle", action="store_true", help="only run the headless benchmarks")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": game.np is not None,
+        "frames": args.frames,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "benchmarks": {}
+    }
+
+    print("Headless:")
+    results["benchmarks"].update(run_benchmarks("headless", game.HeadlessBackend(), args.frames, args.repeat, args.seed))
+
+    if not args.no_turtle:
+        display = start_virtual_display()
+        if display is False:
+            print("Turtle: skipped, there is no display and Xvfb is not installed")
+        else:
+            print("Turtle:")
+            # Sound is not played and frames are not paced so that only drawing is timed
+            backend = game.TurtleBackend(game.NullAudioOutput(), realtime=False)
+            try:
+                results["benchmarks"].update(run_benchmarks("turtle", backend, args.frames, args.repeat, args.seed))
+            finally:
+                if display is not None:
+                    display.terminate()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}, run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"Frame time got more than {args.tolerance:.0%} slower in: {', '.join(regressions)}")
+        return 1
+    print("No frame time regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,37 @@
 import turtle
-import queue
+import tkinter
 import random
 import csv
 import time
-import winsound as ws
-import subprocess
 import threading
+import queue
 import os
+import wave
+import struct
+import zlib
+import array
+import ctypes
+import bisect
+import argparse
+import collections
+import json
+import functools
+import math
+import fractions
+import weakref
+
+try:
+    import numpy as np
+except ImportError:
+    # Without NumPy, items are moved and checked for collisions one at a time
+    np = None
 
 class GameInitialisation:
     """ Class that initialises all game and game window attributes. Contains all variables that may be changed """
-    def __init__(self):
+    def __init__(self, backend=None):
+
+        # Backend used for drawing and sounds, turtle and winsound unless running headless
+        self._backend = backend if backend is not None else TurtleBackend()
 
         # Filenames
         self._other_sprites_file = "other_sprites.txt"
@@ -18,16 +39,25 @@ class GameInitialisation:
         self._stress_items_stats = "stress_items_stats.csv"
         self._bonus_items_stats = "bonus_items_stats.csv"
 
-        # Filepath for playing of sound effects
-        self._pathname = os.getcwd()
+        # Stages and events of the game: their durations, spawn rates, music and the items spawned
+        self._timeline_file = "timeline.json"
+
+        # Animation frames of each character, as images or cut from a sprite sheet, and how long each frame is shown
+        self._animations_file = "animations.json"
+
+        # Full screen images
+        self._title_screen_image = "Title_Screen.gif"
+        self._character_selection_image = "Character_Selection_Page.gif"
+        self._instructions_image = "Instructions_Page.gif"
+        self._results_image = "Results_Page.gif"
+        self._background_images = [self._title_screen_image, self._character_selection_image, self._instructions_image, self._results_image]
+
+        # Sound effects
         self._item_break_file = "ItemBreaking.wav"
         self._item_pickup_file = "ItemPickup.wav"
 
-        # Powershell commands to play sound effects
-        filepath1 = os.path.join(self._pathname, self._item_break_file)
-        filepath2 = os.path.join(self._pathname, self._item_pickup_file)
-        self._pwrshell_break_sound = f'[System.Media.SoundPlayer]::new("{filepath1}").PlaySync()'
-        self._pwrshell_pickup_sound = f'[System.Media.SoundPlayer]::new("{filepath2}").PlaySync()'
+        # All sounds used in the game, loaded once when the game starts
+        self._sound_files = ["Main Menu.wav", "Sakura.wav", "Event.wav", "Bonus Event.wav", "Ending.wav", self._item_break_file, self._item_pickup_file]
 
         # Initialise game screen attributes
         self._screen = None
@@ -42,20 +72,31 @@ class GameInitialisation:
         self._player_speed = 4
         self._player_start_xcor = -400
 
-        # Number of frames for one full player animation cycle
-        self._player_animation_rate = 48
-
-        # Max FPS for game
+        # Number of game logic ticks per second; spawn rates are counted in ticks
         self._game_fps = 120
 
-        # Spawn rate (number of frames) for items
+        # Max FPS for drawing the game, can be different from the tick rate
+        self._render_fps = 120
+
+        # Max number of ticks run in one frame to catch up after the game stalls, the rest of the stall is skipped
+        self._max_catch_up_ticks = 12
+
+        # Highest level the quality governor can lower the quality to when frames take too long, 0 turns it off,
+        # and the most items alive at once at the lowest quality
+        self._max_quality_level = 3
+        self._reduced_max_items = 100
+
+        # Spawn rate (number of frames) for items, set by each stage in the timeline file
         self._item_spawn_rate = None
-        self._normal_spawn_rate = 50
-        self._event_spawn_rate = 30
-        self._bonus_spawn_rate = 10
 
         # Starting x coordinate for spawning items
         self._item_start_xcor = self._screen_width / 2 + 50
+
+        # Maximum number of items alive at the same time
+        self._max_items = 200
+
+        # Number of item sprites created before the game starts and kept for reuse
+        self._sprite_pool_preload = 20
         
         # Game stats
         self._max_stat_value = 100
@@ -68,11 +109,15 @@ class GameInitialisation:
         self._stress_item_dict = {}
         self._bonus_item_dict = {}
 
-        self._events_list = ["Rhino", "Mid Terms", "Recess", "Projects", "Finals"]
+        # Changes made to the item data after it is read, {item name: {column: value}}
+        self._item_stat_changes = {}
 
         self._instruction_screen_duration = 10000
         self._background_scroll_speed = 1
 
+        # Layers of the scrolling background, back to front, layers without a scroll speed use _background_scroll_speed
+        self._background_layers = [{"image": "Background.gif"}]
+
         self._sky_buffer = 350
 
         self._results_font = ('Consolas', 20, 'bold')
@@ -86,56 +131,111 @@ class GameInitialisation:
     
     def get_screen_height(self):
         return self._screen_height
+
+    def get_backend(self):
+        return self._backend
+
+    def get_item_tables(self):
+        # Item tables by the name used for them in the timeline file
+        return {"normal": self._normal_item_dict, "stress": self._stress_item_dict, "bonus": self._bonus_item_dict}
+
+    def get_stat_level(self, value):
+        # Whether a final stat counts as high, low or neutral on the end screen
+        if value > self._stat_high_threshold:
+            return "high"
+        elif value < self._stat_low_threshold:
+            return "low"
+        return "neutral"
+
+    # Setters
+    def change_settings(self, settings):
+        # Changes settings by attribute name, such as {"_player_speed": 5}, must be done before the screen is set up
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise AttributeError(f"There is no setting called {name}")
+            setattr(self, name, value)
+
+        # Settings worked out from the changed settings are worked out again, unless they were changed as well
+        if "_screen_width" in settings and "_item_start_xcor" not in settings:
+            self._item_start_xcor = self._screen_width / 2 + 50
+        if "_max_stat_value" in settings and "_game_stats" not in settings:
+            self._game_stats = {"Stress": 0, "Health": self._max_stat_value, "Grades": 0}
+
+    def change_item_stats(self, changes):
+        # Changes columns of the item stats files for this game only, such as {"Coffee": {"stress": -3}}
+        for item_name, columns in changes.items():
+            self._item_stat_changes.setdefault(item_name, {}).update(columns)
+
+    def use_item_stats_folder(self, folder):
+        # Reads the item stats files found in this folder instead of the ones next to the game
+        for name in ["_normal_items_stats", "_stress_items_stats", "_bonus_items_stats"]:
+            filename = os.path.join(folder, os.path.basename(getattr(self, name)))
+            if os.path.exists(filename):
+                setattr(self, name, filename)
     
     # Functions
     def initialise_screen(self):
-        self._screen = turtle.Screen()
-        turtle.tracer(0, 0)
+        self._screen = self._backend.create_screen()
+        self._backend.tracer(0, 0)
         self._screen.title(self._title)
-        self._screen.setup(width=self._screen_width, height=self._screen_height)
+        # The window is the size of the game multiplied by the scale of the backend
+        scale = self._backend.get_scale()
+        self._screen.setup(width=round(self._screen_width * scale), height=round(self._screen_height * scale))
 
     def register_sprite_images(self):
+        # Item data is read by the asset loader, which reads each file once
         filename_list = [self._normal_items_stats, self._stress_items_stats, self._bonus_items_stats]
         dict_list = [self._normal_item_dict, self._stress_item_dict, self._bonus_item_dict]
 
         for filename, item_dict in zip(filename_list, dict_list):
-            f = open(filename, 'r')
-            csv_reader = list(csv.reader(f, delimiter=','))
-            for row in csv_reader[1:]:
-                turtle.register_shape(f"{row[0]}.gif")
-                item_dict[row[0]] = [int(stat) for stat in row[1:]]
-            f.close()
-    
-    def register_other_images(self):
-        f = open(self._other_sprites_file, "r")
-        names = f.readlines()
-
-        for each_name in names:
-            turtle.register_shape(each_name[:-1] + ".gif")
+            item_dict.update(asset_loader.get_item_table(filename))
+
+        # The item types are shared with the asset loader, so changed items get a changed copy
+        for item_name, changes in self._item_stat_changes.items():
+            item_dicts = [item_dict for item_dict in dict_list if item_name in item_dict]
+            if not item_dicts:
+                raise ValueError(f"Item {item_name} is not in any item stats file")
+            item_dicts[0][item_name] = item_dicts[0][item_name].with_changes(changes)
     
     def execute(self):
         # Set up the screen
         self.initialise_screen()
 
-        # Register images used in game
+        # Load images, sounds and item data used in game, only the first screen shown has to load them
+        asset_loader.load(self)
         self.register_sprite_images()
-        self.register_other_images()
         
 
 class TitleScreen(GameInitialisation):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, backend=None, record_filename=None, profile_filename=None, show_overlay=False, checkpoint_folder=None):
+        super().__init__(backend)
+
+        # If set, the game is recorded to this file so it can be replayed
+        self._record_filename = record_filename
+
+        # If set, a snapshot of the game is saved to this folder every second
+        self._checkpoint_folder = checkpoint_folder
+
+        # Frame timings are saved to this file, and shown on screen if show_overlay
+        self._profile_filename = profile_filename
+        self._show_overlay = show_overlay
 
     def instruction_screen(self):
         self._screen.clear()
-        self._screen.bgpic("Instructions_Page.gif")
+        self._screen.bgpic(self._instructions_image)
         
         # Schedule the actual game start after the delay
         self._screen.ontimer(self.start_game, self._instruction_screen_duration)
 
     def start_game(self):
         self._screen.clear()
-        game = GameController(self._player_sprite) # Create new game instance
+        game = GameController(self._player_sprite, self._backend) # Create new game instance
+        if self._record_filename is not None:
+            game.set_recorder(ReplayRecorder(self._record_filename))
+        if self._profile_filename is not None or self._show_overlay:
+            game.enable_profiler(self._profile_filename, self._show_overlay)
+        if self._checkpoint_folder is not None:
+            game.enable_checkpoints(self._checkpoint_folder)
         game.execute()
 
     def set_male(self):
@@ -148,7 +248,7 @@ class TitleScreen(GameInitialisation):
 
     def choose_char(self):
         self._screen.clear()
-        self._screen.bgpic("Character_Selection_Page.gif")
+        self._screen.bgpic(self._character_selection_image)
         self._screen.onkeypress(self.set_female, "Right")
         self._screen.onkeypress(self.set_male, "Left")
         self._screen.listen()
@@ -159,16 +259,16 @@ class TitleScreen(GameInitialisation):
 
         # ADD YOUR CODE HERE
         # Display game title screen
-        self._screen.bgpic("Title_Screen.gif")
+        self._screen.bgpic(self._title_screen_image)
 
         # Wait for SPACE key to be pressed then start game
         self._screen.onkeypress(self.choose_char, "space")
         self._screen.listen()
         
-        ws.PlaySound('Main Menu.wav', ws.SND_ASYNC + ws.SND_LOOP + ws.SND_FILENAME)
+        self._backend.play_music('Main Menu.wav', loop=True)
 
         # Necessary to prevent Turtle from closing
-        input("")
+        self._backend.wait_for_exit()
 
 
 class GameController(GameInitialisation):
@@ -176,323 +276,652 @@ class GameController(GameInitialisation):
     Class containing all functions related to the game flow and logic 
     Inherits from GameInitialisation to access window and game related attributes 
     """
-    def __init__(self, character_option):
-        super().__init__()
+    def __init__(self, character_option, backend=None, seed=None):
+        super().__init__(backend)
 
         self._player_sprite = character_option
 
-        # Queue containing all objects currently alive, to be executed in that order 
-        self._queue = queue.Queue(200)
+        # All random numbers in a game come from this generator, so a game can be repeated from its seed
+        self._seed = seed if seed is not None else random.randrange(2 ** 32)
+        self._random = random.Random(self._seed)
+
+        # Checksum of every item spawned, used to check that a replay spawned the same items
+        self._timeline_checksum = 0
+
+        # Records the keys pressed, or plays back recorded keys or a simulated player instead of the keyboard
+        self._recorder = None
+        self._replay = None
+        self._policy = None
+
+        # Key events from the window, read once per tick into the key snapshot used by the player
+        self._input = InputQueue()
+        self._key_snapshot = KeySnapshot(0, 0)
+
+        # Snapshot the game starts from, and the folder a snapshot is saved to every second of the game
+        self._snapshot = None
+        self._checkpoint_folder = None
+
+        # Records the time taken by each phase of every frame when profiling
+        self._profiler = None
+        self._profile_filename = None
+        self._performance_overlay = None
+
+        # Game objects, created when the game starts
+        self._display = None
+        self._animator = None
+        self._pacer = None
+        self._governor = None
+
+        # Number of frames drawn, used to draw some parts less often at lower quality levels
+        self._drawn_frames = 0
+        self._backgrounds = []
         self._player = None
 
+        # All live items are kept in the item store
+        self._items = ItemStore(self, self._max_items)
+
+        # Runs the phases of each tick and frame in order
+        self._scheduler = None
+
+        # Text showing the stats, and the instruction banners, which are written once and then shown or hidden
+        self._stats_display = StatsDisplay(self)
+        self._text_cache = TextCache(self._backend)
+        self._shown_banner = None
+
+        # Counter for number of frames generated
+        self._frames = 0
+
+        # Stages and events of the game, compiled into actions sorted by the tick they run on when the game starts
+        self._timeline = None
+        self._timeline_changes = {}
+        self._actions = []
+        self._next_action = 0
+        self._next_action_tick = 0
+
+        # Draws the sprites, with a pool of hidden canvas images reused by items, created once the screen is set up
+        self._renderer = None
+        self._player_list = []
+
         # Attributes relating to the stage and progress of the game
         self._curr_stage = "Normal"
         self._curr_event = None
         self._game_ending = False
 
+        # Picks the items spawned in the current stage, None in stages without items
+        self._spawn_table = None
+
+        # Number of items alive with each name, used for items with a max-concurrent limit
+        self._alive_item_counts = collections.Counter()
+
+        # Finds the items colliding with the player once all items have moved in a frame
+        self._collision = CollisionSystem()
+
     # Getters
     def get_game_fps(self):
         return self._game_fps
 
+    def get_render_fps(self):
+        return self._render_fps
+
+    def get_player(self):
+        return self._player
+
+    def get_seed(self):
+        return self._seed
+
+    def get_random(self):
+        return self._random
+
+    def get_character(self):
+        return self._player_sprite
+
+    def get_game_stats(self):
+        return self._game_stats
+
+    def get_timeline_checksum(self):
+        return self._timeline_checksum
+
+    def get_frames(self):
+        return self._frames
+
+    def get_background_layers(self):
+        return self._backgrounds
+
+    def get_item_type(self, item_name):
+        for item_table in self.get_item_tables().values():
+            if item_name in item_table:
+                return item_table[item_name]
+        raise ValueError(f"Item {item_name} is not in any item stats file")
+
+    # Setters
+    def change_settings(self, settings):
+        super().change_settings(settings)
+
+        # The item store is made with room for _max_items items
+        if "_max_items" in settings:
+            self._items = ItemStore(self, self._max_items)
+
+    def set_recorder(self, recorder):
+        self._recorder = recorder
+
+    def set_replay(self, replay):
+        self._replay = replay
+
+    def set_policy(self, policy):
+        # The policy chooses the keys held down on every tick, used by simulations
+        self._policy = policy
+
+    def set_snapshot(self, snapshot):
+        # The game carries on from the snapshot instead of starting from the first stage
+        self._snapshot = snapshot
+
+    def enable_checkpoints(self, folder):
+        # A snapshot is saved to the folder at the end of every second of the game, named after the second
+        os.makedirs(folder, exist_ok=True)
+        self._checkpoint_folder = folder
+
+    def enable_profiler(self, filename=None, show_overlay=False):
+        # Frame timings are saved to filename.csv and filename.json when the game ends, and shown on screen if show_overlay
+        self._profile_filename = filename
+        self._profiler = FrameProfiler(self._items.get_count)
+        if show_overlay:
+            self._performance_overlay = PerformanceOverlay(self, self._profiler)
+
+    def get_profiler(self):
+        return self._profiler
+
+    def get_input_queue(self):
+        return self._input
+
+    def get_key_snapshot(self):
+        return self._key_snapshot
+
+    def get_quality_level(self):
+        # 0 is full quality, see QualityGovernor for the lower levels
+        if self._governor is None:
+            return 0
+        return self._governor.get_level()
+
+    def get_collision_system(self):
+        return self._collision
+
+    def get_sprite_pool(self):
+        return self._renderer.get_sprite_pool()
+
+    def get_stats_display(self):
+        return self._stats_display
+
+    def get_item_store(self):
+        return self._items
+
+    def get_scheduler(self):
+        return self._scheduler
+
+    def set_timeline(self, timeline):
+        # Replaces the timeline read from the timeline file, must be set before the game starts
+        self._timeline = timeline
+
+    def change_timeline(self, changes):
+        # Changes stages and events of the timeline for this game only, see Timeline.with_changes
+        self._timeline_changes = changes
+
     # Functions / Procedures
     def check_collision(self, object1, object2):
-        # Get the range of x, y coordinates of the two objects
-        obj_1_x_range = range(int(object1.get_xcor() - object1.get_x_padding()), int(object1.get_xcor() + object1.get_x_padding() + 1))
-        obj_2_x_range = range(int(object2.get_xcor() - object2.get_x_padding()), int(object2.get_xcor() + object2.get_x_padding() + 1))
-        obj_1_y_range = range(int(object1.get_ycor() - object1.get_y_padding()), int(object1.get_ycor() + object1.get_y_padding() + 1))
-        obj_2_y_range = range(int(object2.get_ycor() - object2.get_y_padding()), int(object2.get_ycor() + object2.get_y_padding() + 1))
-        x_range_same = None
-        y_range_same = None
-        
-        # Check if any of the x, y coordinate overlap
-        for i in obj_1_x_range:
-            if i in obj_2_x_range:
-                x_range_same = True
-                break
-        for j in obj_1_y_range:
-            if j in obj_2_y_range:
-                y_range_same = True
-                break
-            
-        # If the x and y coordinate overlaps the object collides
-        return x_range_same and y_range_same
+        # Check if the x, y coordinate ranges of the two objects overlap
+        return self._collision.overlaps(object1, object2)
 
     def spawn_random_item(self):
-        # Spawns random items based on the current stage of the game
-        if self._curr_stage == "Normal":
-            item_list = list(self._normal_item_dict.keys())
-            item_name = random.choice(item_list)
-            item_data = self._normal_item_dict[item_name]
-
-        elif self._curr_stage == "Event":
-            match self._curr_event:
-                case "Rhino":
-                    item_name = "Rhino"
-                    item_data = self._stress_item_dict[item_name]
-
-                case "Mid Terms" | "Finals":
-                    item_name = "Exam"
-                    item_data = self._stress_item_dict[item_name]
-
-                case "Recess":
-                    item_list = list(self._bonus_item_dict.keys())
-                    item_name = random.choice(item_list)
-                    item_data = self._bonus_item_dict[item_name]
-
-                case "Projects":
-                    item_name = random.choice(["1DProject", "2DProject"])
-                    item_data = self._stress_item_dict[item_name]
-
-                case _:
-                    return
-        else:
+        # Spawns a random item from the spawn table of the current stage, no items spawn in stages without items
+        if self._spawn_table is None:
+            return
+        item_type = self._spawn_table.pick(self._random)
+        item_name = item_type.get_name()
+
+        # Skip spawning if the maximum number of items, or of this item, are already alive
+        if self._items.is_full():
             return
+        if self.get_quality_level() >= 3 and self._items.get_count() >= self._reduced_max_items:
+            return
+        max_concurrent = item_type.get_max_concurrent()
+        if max_concurrent and self._alive_item_counts[item_name] >= max_concurrent:
+            return
+
+        # Start at a random height below the sky, moving left at around the speed of its item type
+        ycor = self._random.randint((- self._screen_height // 2) + 30, (self._screen_height // 2) - 200)
+        base_speed = item_type.get_speed()
+        speed = self._random.randint(base_speed - 1, base_speed + 1)
+
+        # Instantiate the item, add it to the item store and give it a canvas image to be drawn with
+        item = Item(item_type, self._item_start_xcor, ycor, speed, self._screen_width)
+        self._items.add(item)
+        self._renderer.add(item)
+        self._alive_item_counts[item_name] += 1
 
-        # Instantiate the item and add it to the queue
-        self._queue.put(Item(self, self._item_start_xcor, item_name, item_data))
+        # Add the spawn to the checksum of all spawns
+        spawn = f"{self._frames},{item_name},{item.get_ycor()},{item.get_speed()}"
+        self._timeline_checksum = zlib.crc32(spawn.encode(), self._timeline_checksum)
     
+    def create_background_layers(self):
+        # Each layer is drawn from its picture repeated enough times to cover the screen while it scrolls by one picture
+        layers = []
+        for layer in self._background_layers:
+            image = layer["image"]
+            tile_width = self._backend.get_image_width(image) or self._screen_width
+
+            # The first picture is centred when it is wider than the screen, and starts at the left edge otherwise
+            left_xcor = - max(tile_width, self._screen_width) / 2
+            tiles = math.ceil((self._screen_width / 2 - left_xcor) / tile_width) + 1
+            shape = self._backend.register_tiled_shape(image, tiles)
+            speed = layer.get("scroll_speed", self._background_scroll_speed)
+            layers.append(BackgroundLayer(shape, tile_width, left_xcor + tiles * tile_width / 2, speed))
+        return layers
+
     def listen_for_keypress(self):
-        # Listen for keypress/release; used to move the player
-        self._screen.onkeypress(self._player.up_pressed, "Up")
-        self._screen.onkeypress(self._player.down_pressed, "Down")
-        self._screen.onkeypress(self._player.right_pressed, "Right")
-        self._screen.onkeypress(self._player.left_pressed, "Left")
-        self._screen.onkeyrelease(self._player.up_released, "Up")
-        self._screen.onkeyrelease(self._player.down_released, "Down")
-        self._screen.onkeyrelease(self._player.right_released, "Right")
-        self._screen.onkeyrelease(self._player.left_released, "Left")
-        self._screen.listen()
+        # Listen for keypress/release; the events are queued and used to move the player on the next tick
+        self._input.listen(self._screen)
 
     def display_stats_icons(self):
-        # Create turtle for each stat icon
-        grades = turtle.Turtle()
-        grades.speed(0)
-        grades.penup()
-        grades.shape(f"Grades.gif")
-        grades.setx(- (self._screen_width / 2) + 50)
-        grades.sety((self._screen_height / 2) - 40)
-
-        health = turtle.Turtle()
-        health.shape(f"Health.gif")
-        health.speed(0)
-        health.penup()
-        health.setx(- (self._screen_width / 2) + 50)
-        health.sety((self._screen_height / 2) - 110)
-
-        stress = turtle.Turtle()
-        stress.shape(f"Stress.gif")
-        stress.speed(0)
-        stress.penup()
-        stress.setx(- (self._screen_width / 2) + 50)
-        stress.sety((self._screen_height / 2) - 180)
+        # Stat icons do not move, so they are placed once as sprites of the backend
+        icons = []
+        for index, stat in enumerate(["Grades", "Health", "Stress"]):
+            icon = self._backend.create_sprite()
+            self._backend.set_sprite_shape(icon, f"{stat}.gif")
+            self._backend.set_sprite_visible(icon, True)
+            icons.append((icon, - (self._screen_width / 2) + 50, (self._screen_height / 2) - 40 - 70 * index))
+        self._backend.move_sprites(icons)
+
+    def remove_item(self, item):
+        # Called by the item store when an item is collected or leaves the screen
+        item.kill()
+        self._renderer.remove(item)
+        self._alive_item_counts[item.get_name()] -= 1
 
     def play_breaking_sound(self):
-        subprocess.run(['powershell', '-Command', self._pwrshell_break_sound])
+        self._backend.play_effect(self._item_break_file)
 
     def play_pickup_sound(self):
-        subprocess.run(['powershell', '-Command', self._pwrshell_pickup_sound])
-
-    def update_stats_display(self, stats_turtle):
-        stats_turtle.clear()
-        stats_turtle.speed(0)
-        stats_turtle.penup()
-        stats_turtle.hideturtle()
-        stats_turtle.color("navy")
-        stats_turtle.setx(- (self._screen_width / 2) + 100)
-        stats_turtle.sety((self._screen_height / 2) - 72)
-        stats_turtle.write(self._game_stats["Grades"], False, align='left', font=self._stats_font)
-        stats_turtle.sety((self._screen_height / 2) - 142)
-        stats_turtle.write(self._game_stats["Health"], False, align='left', font=self._stats_font)
-        stats_turtle.sety((self._screen_height / 2) - 212)
-        stats_turtle.write(self._game_stats["Stress"], False, align='left', font=self._stats_font)
-
-    def show_instructions(self, instruction_turtle, next_event):
-        instruction_turtle.speed(0)
-        instruction_turtle.penup()
-        instruction_turtle.hideturtle()
-        instruction_turtle.color("maroon")
-        instruction_turtle.setx(0)
-        instruction_turtle.sety((self._screen_height / 2) - 100)
-        if next_event == "Recess":
-            instruction_turtle.color("navy")
-            instruction_turtle.write("Bonus Event! It's recess week!\nCollect all the items!", False, align='center', font=self._instructions_font)
+        self._backend.play_effect(self._item_pickup_file)
+
+    def get_instructions_banner(self, next_event, bonus=False):
+        # (xcor, ycor, text, align, font, color) of the banner warning about the next event
+        ycor = (self._screen_height / 2) - 100
+        if bonus:
+            return (0, ycor, f"Bonus Event! It's {next_event.lower()} week!\nCollect all the items!", "center", self._instructions_font, "navy")
+        return (0, ycor, f"Oh no, {next_event} ahead!\nAvoid all the stress!", "center", self._instructions_font, "maroon")
+
+    def prepare_instructions(self):
+        # Writes every banner in the timeline before the game starts, hidden until its event is next
+        for action in self._actions:
+            if action.get_instructions() == "show":
+                self._text_cache.prepare(*self.get_instructions_banner(action.get_event(), action.is_bonus()))
+
+    def show_instructions(self, next_event, bonus=False):
+        self.hide_instructions()
+        self._shown_banner = self.get_instructions_banner(next_event, bonus)
+        self._text_cache.show(*self._shown_banner)
+
+    def hide_instructions(self):
+        if self._shown_banner is not None:
+            self._text_cache.hide(*self._shown_banner)
+            self._shown_banner = None
+
+    def collect_item(self, item):
+        # print(f"Player collided with {type(item)} {item} with name {item.get_name()} at {item.get_location()}.")
+
+        if item.get_name() in ["Crate1", "Crate2", "Crate3", "Rhino"]:
+            self.play_breaking_sound()
         else:
-            instruction_turtle.color("maroon")
-            instruction_turtle.write(f"Oh no, {next_event} ahead!\nAvoid all the stress!", False, align='center', font=self._instructions_font)
+            self.play_pickup_sound()
 
-    def hide_instructions(self, instructions_turtle):
-        instructions_turtle.clear()
+        # Update game stats
+        self._game_stats["Stress"] += item.get_stress()
+        self._game_stats["Health"] += item.get_health()
+        self._game_stats["Grades"] += item.get_grades()
 
-    # Execute
-    def execute(self):
-        super().execute()
+        self._game_stats["Stress"] = max(min(self._game_stats["Stress"], self._max_stat_value), 0)
+        self._game_stats["Health"] = max(min(self._game_stats["Health"], self._max_stat_value), 0)
+        self._game_stats["Grades"] = max(min(self._game_stats["Grades"], self._max_stat_value), 0)
+
+        # print(self._game_stats)
+
+    def update_stage(self):
+        # Runs once at the start of every tick: stage changes and spawning of items
+
+        # Stage changes only run on the ticks of the timeline actions
+        if self._frames >= self._next_action_tick:
+            self.run_due_actions()
+
+        # End the game if it is ending and no more items are alive
+        if self._game_ending and self._items.is_empty():
+            self._scheduler.stop()
+            return
+
+        # Spawn a random item based on the spawn rate
+        if self._frames % self._item_spawn_rate == 0 and not self._game_ending:
+            self.spawn_random_item()
         
-        # Add objects to queue
-        self._queue.put(Display())
-        self._queue.put(Delay(self))
-        self._queue.put(Background(self, 1))
-        self._queue.put(Background(self, 2))
+        self._frames += 1
+
+    def run_due_actions(self):
+        # Runs every action due on this tick, then finds the tick of the next action
+        while self._next_action < len(self._actions) and self._actions[self._next_action].get_tick() <= self._frames:
+            self.start_action(self._actions[self._next_action])
+            self._next_action += 1
+
+        if self._next_action < len(self._actions):
+            self._next_action_tick = self._actions[self._next_action].get_tick()
+        else:
+            self._next_action_tick = float("inf")
+
+    def start_action(self, action):
+        # Starts the stage of a timeline action, or starts ending the game
+        if action.get_instructions() == "hide":
+            self.hide_instructions()
+        elif action.get_instructions() == "show":
+            self.show_instructions(action.get_event(), action.is_bonus())
+
+        if action.get_music() is not None:
+            self._backend.play_music(action.get_music(), loop=action.is_music_looped())
+
+        # The game ends once the items left on screen are gone
+        if action.is_ending():
+            self._game_ending = True
+            return
+
+        self._curr_stage = action.get_stage()
+        self._curr_event = action.get_event()
+        self._item_spawn_rate = action.get_spawn_rate()
+        self._spawn_table = action.get_spawn_table()
+
+    def read_input(self):
+        # Keys held down come from the replay when replaying, the policy when simulating, or else the window's key events,
+        # and are saved when recording
+        if self._replay is not None:
+            self._key_snapshot = KeySnapshot(self._frames, self._replay.get_next_key_mask())
+        elif self._policy is not None:
+            self._key_snapshot = KeySnapshot(self._frames, self._policy.get_key_mask(self))
+        else:
+            self._key_snapshot = self._input.take_snapshot(self._frames)
+        self._player.set_key_mask(self._key_snapshot.get_key_mask())
+        if self._recorder is not None:
+            self._recorder.record_tick(self._key_snapshot.get_key_mask())
+        self._player.update_speed()
+
+    def present(self):
+        # Shows the frame, which is when the key events read since the last frame reach the screen
+        self._display.execute()
+        self._input.mark_displayed()
+
+    def save_snapshot(self):
+        # Returns the state of the game between two ticks as bytes, see GameSnapshot
+        rng_version, rng_state, gauss_next = self._random.getstate()
+        items = self._items.sync_items()
+        names = [self._curr_stage or "", self._curr_event or ""] + sorted({item.get_name() for item in items})
+        name_indexes = {name: index for index, name in enumerate(names)}
+        game_stats = self._game_stats
+
+        data = [
+            struct.pack(
+                GameSnapshot.header_format, GameSnapshot.magic, GameSnapshot.version, self._seed,
+                ReplayRecorder.characters.index(self._player_sprite), self._frames, self._next_action, self._game_ending,
+                self._timeline_checksum, game_stats["Stress"], game_stats["Health"], game_stats["Grades"],
+                self._player.get_key_mask(), len(items), len(self._backgrounds), len(names)
+            ),
+            struct.pack(GameSnapshot.random_format, *rng_state, gauss_next is not None, gauss_next or 0),
+            struct.pack(GameSnapshot.position_format, *self._player.get_positions())
+        ]
+        for layer in self._backgrounds:
+            data.append(struct.pack(GameSnapshot.position_format, *layer.get_positions()))
+        for item in items:
+            data.append(struct.pack(GameSnapshot.item_format, name_indexes[item.get_name()], item.get_speed(), *item.get_positions()))
+        data.append("\n".join(names).encode())
+        return zlib.compress(b"".join(data), 1)
+
+    def restore_snapshot(self, snapshot):
+        # Carries on from a snapshot of a game with the same seed, character, settings and timeline
+        if snapshot.get_seed() != self._seed or snapshot.get_character() != self._player_sprite:
+            raise ValueError("The snapshot was taken in a game with a different seed or character")
+
+        self._frames = snapshot.get_frames()
+        self._random.setstate(snapshot.get_random_state())
+        self._timeline_checksum = snapshot.get_timeline_checksum()
+        self._game_stats.update(snapshot.get_game_stats())
+        self.restore_actions(snapshot.get_next_action())
+        if (self._curr_stage or "", self._curr_event or "", self._game_ending) != snapshot.get_stage():
+            raise ValueError("The snapshot was taken in a game with a different timeline")
+
+        self._player.set_positions(*snapshot.get_player_positions())
+        self._player.set_key_mask(snapshot.get_key_mask())
+        for layer, positions in zip(self._backgrounds, snapshot.get_layer_positions()):
+            layer.set_positions(*positions)
+
+        # Items are made again from their item types, in the order they were spawned
+        self._items.clear()
+        for item_name, speed, positions in snapshot.get_items():
+            item = Item(self.get_item_type(item_name), self._item_start_xcor, 0, speed, self._screen_width)
+            item.set_positions(*positions)
+            self._items.add(item)
+            self._renderer.add(item)
+            self._alive_item_counts[item_name] += 1
+
+        self._stats_display.update(self._game_stats)
+
+    def restore_actions(self, next_action):
+        # Sets the stage of the last action before next_action without running every action,
+        # then plays the music and shows the banner that would be playing and shown by then
+        music_action = None
+        instructions_action = None
+        for action in self._actions[:next_action]:
+            if action.get_music() is not None:
+                music_action = action
+            if action.get_instructions() is not None:
+                instructions_action = action
+            if action.is_ending():
+                self._game_ending = True
+            else:
+                self._curr_stage = action.get_stage()
+                self._curr_event = action.get_event()
+                self._item_spawn_rate = action.get_spawn_rate()
+                self._spawn_table = action.get_spawn_table()
+
+        self._next_action = next_action
+        if next_action < len(self._actions):
+            self._next_action_tick = self._actions[next_action].get_tick()
+        else:
+            self._next_action_tick = float("inf")
+
+        if instructions_action is not None and instructions_action.get_instructions() == "show":
+            self.show_instructions(instructions_action.get_event(), instructions_action.is_bonus())
+        else:
+            self.hide_instructions()
+        if music_action is not None:
+            self._backend.play_music(music_action.get_music(), loop=music_action.is_music_looped())
+
+    def save_checkpoint(self):
+        # Saves a snapshot after the last tick of every second of the game
+        if self._frames % self._game_fps == 0:
+            filename = os.path.join(self._checkpoint_folder, f"{self._frames // self._game_fps:04d}.snap")
+            with open(filename, "wb") as f:
+                f.write(self.save_snapshot())
+
+    def update_player(self):
+        # Moves the backgrounds then the player, the background stops scrolling at quality level 2 and below
+        if self.get_quality_level() < 2:
+            for background in self._backgrounds:
+                background.save_position()
+                background.execute()
+        self._player.save_position()
+        self._player.move()
+
+    def draw_sprites(self):
+        # Changes the animation frames, then draws every sprite in between its last two positions,
+        # depending on how far the frame is into the next tick
+        # Animations change every other frame at quality level 1 and below
+        alpha = self._scheduler.get_alpha()
+        self._drawn_frames += 1
+        if self.get_quality_level() < 1 or self._drawn_frames % 2 == 0:
+            self._animator.update((self._frames - 1 + alpha) / self._game_fps)
+        self._renderer.draw(self._backgrounds, alpha)
+        self._renderer.draw(self._player_list, alpha)
+        self._items.draw(self._renderer, alpha)
+        self._renderer.flush()
+
+    def set_render_fps(self, render_fps):
+        # Changes how often the game is drawn without changing the speed of the game
+        self._render_fps = render_fps
+        if self._pacer is not None:
+            self._pacer.set_render_rate(render_fps)
+
+    def update_hud(self):
+        # Changes the stats shown once per frame, only for the stats that changed since the last frame
+        # At quality level 1 and below the changes of 4 frames are shown together
+        if self.get_quality_level() >= 1 and self._drawn_frames % 4 != 0:
+            return
+        self._stats_display.update(self._game_stats)
+
+    def set_up_game(self):
+        # Sets up the screen, game objects and frame phases without starting the game loop
+        super().execute()
+
+        # Compile the stages and events into actions, the first action runs on the first tick
+        if self._timeline is None:
+            self._timeline = Timeline(asset_loader.get_config(self._timeline_file))
+        if self._timeline_changes:
+            self._timeline = self._timeline.with_changes(self._timeline_changes)
+        self._actions = self._timeline.compile(self)
+        self._next_action = 0
+        self._next_action_tick = self._actions[0].get_tick() if self._actions else float("inf")
+
+        # Create the game objects, items are added to the item store as they spawn
+        self._display = Display(self)
+        self._backgrounds = self.create_background_layers()
 
-        self._player = Player(self)
-        self._queue.put(self._player)
+        # The player is animated with the frames of its character, and starts on the first frame
+        self._animator = Animator(asset_loader.get_config(self._animations_file))
+        self._player = Player(self, self._animator.get_animation(self._player_sprite).get_frame_shape(0))
+        self._player_list = [self._player]
+
+        # Canvas images are drawn over the ones made before them, so the backgrounds and player get theirs first
+        self._renderer = SpriteRenderer(self._backend, SpritePool(self._backend, self._max_items))
+        for sprite in self._backgrounds + self._player_list:
+            self._renderer.add(sprite)
+
+        # Create the canvas images for the items up front so spawning does not create new ones
+        self._renderer.get_sprite_pool().preload(self._sprite_pool_preload)
+
+        self._animator.add(self._player, self._player_sprite)
 
         self.display_stats_icons()
-        stats_turtle = turtle.Turtle()
-        self.update_stats_display(stats_turtle)
-        instructions_turtle = turtle.Turtle()
-        self.show_instructions(instructions_turtle, None)
+        self._stats_display.show(self._game_stats)
+        self.prepare_instructions()
         
         # Starts taking in inputs from user to control the player
         self.listen_for_keypress()
-        
-        # Counter for number of frames generated and seconds passed
-        frames = 0
-        seconds = 0
 
-        # Run the game loop while game hasn't end
-        while True:
-            while not self._queue.empty():
-                
-                nxt_obj = self._queue.get()
-                
-                if type(nxt_obj) == Display:
-                    # Display object is executed once every frame 
-
-                    # One cycle animation cycle for player has 4 frames/stages
-                    if frames % (self._player_animation_rate // 4) == 0:
-                        self._player.update_frame((frames // (self._player_animation_rate // 4)) % 4)
-
-                    if frames % self._game_fps == 0:
-                        # The following runs once every second
-                        match seconds % 30:
-                            # Event cycle repeats every 30 seconds
-                            case 0:
-                                self.hide_instructions(instructions_turtle)
-
-                                # End game after finals or start the normal stage
-                                if self._curr_event == "Finals":
-                                    ws.PlaySound(None,ws.SND_PURGE)
-                                    ws.PlaySound('Ending.wav', ws.SND_ASYNC + ws.SND_LOOP + ws.SND_FILENAME)
-                                    self._game_ending = True
-                                
-                                else:
-                                    self._curr_stage = "Normal"
-                                    self._item_spawn_rate = self._normal_spawn_rate
-                                    ws.PlaySound(None,ws.SND_PURGE)
-                                    ws.PlaySound('Sakura.wav', ws.SND_ASYNC + ws.SND_FILENAME)
-
-                            case 15:
-                                # Transition to event stage. No items spawning at this point.
-                                if self._curr_event == "Mid Terms":
-                                    # Current event hasn't been updated at this point; 
-                                    # So if the last event event is Mid Terms, start playing bonus stage music
-                                    ws.PlaySound(None, ws.SND_PURGE) 
-                                    ws.PlaySound('Bonus Event.wav', ws.SND_ASYNC + ws.SND_FILENAME)
-                                    
-                                else:
-                                    ws.PlaySound(None, ws.SND_PURGE)
-                                    ws.PlaySound('Event.wav', ws.SND_ASYNC + ws.SND_FILENAME)
-
-                                self._curr_stage = "NormalTransition"
-                                self._item_spawn_rate = 1
-                                self.show_instructions(instructions_turtle, self._events_list[seconds // 30])
-
-                            case 18:
-                                # Start event stage
-                                self._curr_stage = "Event"
-                                self._item_spawn_rate = self._normal_spawn_rate
-                                self._curr_event = self._events_list[seconds // 30]
-
-                            case 28:
-                                # Transition back to normal stage. No items spawning at this point.
-                                self._curr_stage = "EventTransition"
-                                self._item_spawn_rate = 1
-                                
-                        seconds += 1
-
-                    # Show end screen if game ended and no more items left in queue
-                    if self._game_ending and self._queue.qsize() == 4:
-                        stats_turtle.clear()
-                        ending_screen = EndScreen(self._game_stats)
-                        ending_screen.execute()
-                        return
-
-                    # Spawn a random item based on the spawn rate
-                    if frames % self._item_spawn_rate == 0 and not self._game_ending:
-                        self.spawn_random_item()
-                    
-                    frames += 1
-
-                # Execute code for next object
-                result = nxt_obj.execute()
-
-                # If type of object is Item
-                if type(nxt_obj) == Item:
-                    
-                    # Check if Item collides with Player
-                    collide_result = self.check_collision(self._player, nxt_obj)
-
-                    # If item collides with Player
-                    if collide_result == True:
-                        # print(f"Player collided with {type(nxt_obj)} {nxt_obj} with name {nxt_obj.get_name()} at {nxt_obj.get_location()}.")
-                        
-                        if nxt_obj.get_name() in ["Crate1", "Crate2", "Crate3", "Rhino"]:
-                            play_thread = threading.Thread(target=self.play_breaking_sound)
-                            play_thread.start()
-                        else:
-                            play_thread = threading.Thread(target=self.play_pickup_sound)
-                            play_thread.start()
-
-                        # Update game stats
-                        self._game_stats["Stress"] += nxt_obj.get_stress()
-                        self._game_stats["Health"] += nxt_obj.get_health()
-                        self._game_stats["Grades"] += nxt_obj.get_grades()
-
-                        self._game_stats["Stress"] = max(min(self._game_stats["Stress"],100), 0)
-                        self._game_stats["Health"] = max(min(self._game_stats["Health"],100), 0)
-                        self._game_stats["Grades"] = max(min(self._game_stats["Grades"],100), 0)
-                        
-                        # print(self._game_stats)
-                            
-                        # Updates the stat display
-                        self.update_stats_display(stats_turtle)
-                        
-                        # Kill Item instance
-                        result = False
-
-                # If execute function returns True, object will be added back to queue
-                if result:
-                    self._queue.put(nxt_obj)
-                else:
-                    nxt_obj.kill()
+        # Headless games run one tick per frame as fast as possible
+        if self._backend.is_realtime():
+            self._pacer = FramePacer(self._game_fps, self._render_fps, self._max_catch_up_ticks)
+
+            # Fewer items spawn at the lowest quality, which would change the items of a recorded game
+            max_level = self._max_quality_level if self._recorder is None else min(self._max_quality_level, 2)
+            if max_level > 0:
+                self._governor = QualityGovernor(self._pacer, max_level)
+        self._scheduler = FrameScheduler(self._pacer, self._profiler)
+
+        # Phases of each tick, in the order they are run
+        self._scheduler.add_tick_phase("Stage", self.update_stage)
+        self._scheduler.add_tick_phase("Input", self.read_input)
+        self._scheduler.add_tick_phase("Player", self.update_player)
+        self._scheduler.add_tick_phase("Items", self._items.move_items)
+        self._scheduler.add_tick_phase("Collision", self._items.check_collisions)
+        if self._checkpoint_folder is not None:
+            self._scheduler.add_tick_phase("Checkpoint", self.save_checkpoint)
+
+        # Phases of each frame after the ticks have run, headless games have nothing to draw or show
+        if self._backend.draws_images():
+            self._scheduler.add_frame_phase("HUD", self.update_hud)
+            self._scheduler.add_frame_phase("Draw", self.draw_sprites)
+            if self._performance_overlay is not None:
+                self._performance_overlay.show()
+                self._scheduler.add_frame_phase("Overlay", self._performance_overlay.update)
+            self._scheduler.add_frame_phase("Present", self.present)
+        if self._governor is not None:
+            self._scheduler.add_frame_phase("Governor", self._governor.update)
+        if self._pacer is not None:
+            self._scheduler.add_frame_phase("Pacing", self._pacer.wait_for_next_frame)
+
+    def play(self):
+        # Plays the game until it ends, without showing the end screen
+        self.set_up_game()
+        if self._snapshot is not None:
+            self.restore_snapshot(self._snapshot)
+
+        # Run the game loop until the game ends
+        self._scheduler.run()
+
+        if self._profiler is not None and self._profile_filename is not None:
+            self._profiler.set_input_latencies(self._input.get_latencies())
+            if self._governor is not None:
+                self._profiler.set_quality_changes(self._governor.get_level_changes())
+            self._profiler.export_csv(self._profile_filename + ".csv")
+            self._profiler.export_json(self._profile_filename + ".json")
+        if self._performance_overlay is not None:
+            self._performance_overlay.hide()
+
+        if self._recorder is not None:
+            self._recorder.save(self)
+
+        self._stats_display.hide()
+        return self._game_stats
+
+    # Execute
+    def execute(self):
+        self.play()
+
+        # Show end screen
+        ending_screen = EndScreen(self._game_stats, self._backend)
+        ending_screen.execute()
+        return self._game_stats
 
 class Sprite:
-    """ Class containing all basic attributes and functions related to sprites(moving images)"""
-    def __init__(self, controller):
-        self._controller = controller
+    """ 
+    Class containing all basic attributes and functions related to sprites(moving images)
+    Sprites only hold the position used by the game logic; they are drawn by the sprite renderer, which reads them 
+    Attributes are kept in slots instead of a dictionary for each sprite, which makes them smaller and faster to read 
+    """
+    __slots__ = ("_alive", "_shape", "_xcor", "_ycor", "_prev_xcor", "_prev_ycor", "_x_padding", "_y_padding", "_speed")
+
+    def __init__(self, shape, x_padding=0, y_padding=0, speed=0):
         self._alive = True
 
-        # Turtle initialisations
-        self._obj = turtle.Turtle()
-        self._obj.speed(0)
-        self._obj.penup()
+        # Name of the image drawn for the sprite
+        self._shape = shape
+
+        # Current position and position at the start of the current tick, used to draw in between ticks
+        self._xcor = 0
+        self._ycor = 0
+        self._prev_xcor = 0
+        self._prev_ycor = 0
 
-        # Will be defined in subclasses
-        self._speed = None
-        self._x_padding = None
-        self._y_padding = None
+        # Distance from the centre to the edges used for collisions, and speed in pixels per tick
+        self._x_padding = x_padding
+        self._y_padding = y_padding
+        self._speed = speed
 
     def get_speed(self):
         return self._speed
     
     def is_alive(self):
         return self._alive
+
+    def get_shape(self):
+        return self._shape
     
     def get_xcor(self):
-        return self._obj.xcor()
+        return self._xcor
     
     def get_ycor(self):
-        return self._obj.ycor()
+        return self._ycor
     
     def get_x_padding(self):
         return self._x_padding
@@ -501,31 +930,71 @@ class Sprite:
         return self._y_padding
     
     def get_location(self):
-        return (self._obj.xcor(), self._obj.ycor())
+        return (self._xcor, self._ycor)
+
+    def get_positions(self):
+        # (previous x, previous y, x, y), saved in snapshots
+        return (self._prev_xcor, self._prev_ycor, self._xcor, self._ycor)
 
+    def get_draw_position(self, alpha):
+        # Position between the previous and current position, alpha is how far into the next tick the frame is
+        return (
+            self._prev_xcor + (self._xcor - self._prev_xcor) * alpha,
+            self._prev_ycor + (self._ycor - self._prev_ycor) * alpha
+        )
 
-class Background(Sprite):
-    """ Class for the background image, 2 background sprites are used to create the baclground scrolling effect"""
-    def __init__(self, controller, number):
-        super().__init__(controller)
+    def set_xcor(self, xcor):
+        self._xcor = xcor
 
-        self._obj.shape("Background.gif")
+    def set_ycor(self, ycor):
+        self._ycor = ycor
 
-        # Set initial position of background
-        if number == 1:
-            self._obj.setx(0)
-        elif number == 2:
-            self._obj.setx(self._controller.get_screen_width())
+    def set_shape(self, name):
+        self._shape = name
 
-        self._speed = self._controller._background_scroll_speed
+    def set_positions(self, prev_xcor, prev_ycor, xcor, ycor):
+        # Used when restoring a snapshot
+        self._prev_xcor = prev_xcor
+        self._prev_ycor = prev_ycor
+        self._xcor = xcor
+        self._ycor = ycor
+
+    def teleport(self, xcor, ycor):
+        # Moves the sprite without drawing it in between the old and new position
+        self._xcor = self._prev_xcor = xcor
+        self._ycor = self._prev_ycor = ycor
+
+    def save_position(self):
+        # Called at the start of every tick before the sprite moves
+        self._prev_xcor = self._xcor
+        self._prev_ycor = self._ycor
+
+    def kill(self):
+        self._alive = False
 
-    def move(self):
-        # Teleports the background back to the right if the background is longer in the screen
-        if self._obj.xcor() <= - self._controller.get_screen_width():
-             self._obj.setx(self._controller.get_screen_width())
 
-        # Moves the background
-        self._obj.setx(self._obj.xcor() - self._speed)
+class BackgroundLayer(Sprite):
+    """ 
+    One layer of the scrolling background, drawn as one image of its picture repeated side by side 
+    The image is wide enough to cover the screen at any scroll position, so a frame only moves one image per layer 
+    """
+    __slots__ = ("_tile_width", "_wrap_xcor")
+
+    def __init__(self, shape, tile_width, start_xcor, speed):
+        super().__init__(shape, speed=speed)
+
+        # Width of one picture, the layer moves back by this much each time a whole picture has scrolled past
+        self._tile_width = tile_width
+        self._wrap_xcor = start_xcor - tile_width
+
+        self.teleport(start_xcor, 0)
+
+    def move(self):
+        # Moves the layer, moving it back by one picture looks the same and is drawn smoothly as both positions move
+        self._xcor -= self._speed
+        if self._xcor <= self._wrap_xcor:
+            self._xcor += self._tile_width
+            self._prev_xcor += self._tile_width
 
     def execute(self):
         self.move()    
@@ -534,32 +1003,27 @@ class Background(Sprite):
 
 class Player(Sprite):
     """ Class containing all the attributes and functions related to the player sprite """
-    def __init__(self, controller):
-        super().__init__(controller)
+    __slots__ = ("_key_mask", "_speed_x", "_speed_y", "_min_xcor", "_max_xcor", "_min_ycor", "_max_ycor")
 
-        # Attributes whether up/down/left/right key is pressed
-        self._up = False
-        self._down = False
-        self._left = False
-        self._right = False
+    def __init__(self, controller, shape):
+        # The shape is the first frame of the character's animation
+        super().__init__(shape, controller._player_x_padding, controller._player_y_padding, controller._player_speed)
 
-        self._x_padding = self._controller._player_x_padding
-        self._y_padding = self._controller._player_y_padding
-
-        self._speed = self._controller._player_speed
+        # Keys held down in the current tick as bits, set from the key snapshot of every tick
+        self._key_mask = 0
 
         self._speed_x = 0
         self._speed_y = 0
 
-        self._alive = True
-
-        # Turtle initialisations
-        self._obj.shape(f"{self._controller._player_sprite}0.gif")
-        self._obj.goto(self._controller._player_start_xcor, 0)
+        # The player is kept within the screen, below the sky
+        screen_width = controller.get_screen_width()
+        screen_height = controller.get_screen_height()
+        self._min_xcor = self._x_padding - (screen_width / 2)
+        self._max_xcor = (screen_width / 2) - self._x_padding
+        self._min_ycor = self._y_padding - (screen_height / 2)
+        self._max_ycor = (screen_height / 2) - controller._sky_buffer + self._y_padding
 
-    def update_frame(self, frame_no):
-        # Updates frame to create player animation
-        self._obj.shape(f"{self._controller._player_sprite}{frame_no}.gif")
+        self.teleport(controller._player_start_xcor, 0)
 
     def update_speed(self):
         """ Updates the speed based on what key is pressed. Allows for multiple keys to be pressed at the same time """
@@ -568,67 +1032,37 @@ class Player(Sprite):
         self._speed_y = 0
         
         # Set speed according to what keys are pressed
-        if self._up:
+        if self._key_mask & InputQueue.UP:
             self._speed_y += self._speed
-        if self._down:
+        if self._key_mask & InputQueue.DOWN:
             self._speed_y -= self._speed
-        if self._right:
+        if self._key_mask & InputQueue.RIGHT:
             self._speed_x += self._speed
-        if self._left:
+        if self._key_mask & InputQueue.LEFT:
             self._speed_x -= self._speed
 
     def move(self):
         # Teleports the player back within the screen if player goes out
-        if self.get_ycor() - self.get_y_padding() > (self._controller.get_screen_height() / 2) - self._controller._sky_buffer:
-            self._obj.sety((self._controller.get_screen_height() / 2) - self._controller._sky_buffer + self.get_y_padding())
-            # print("Too High!")
-        elif self.get_ycor() - self.get_y_padding() < (self._controller.get_screen_height()) / (-2):
-            self._obj.sety(self.get_y_padding() - (self._controller.get_screen_height() / 2))
-            # print("Too Low!")
+        if self._ycor > self._max_ycor:
+            self._ycor = self._max_ycor
+        elif self._ycor < self._min_ycor:
+            self._ycor = self._min_ycor
             
-        if self.get_xcor() + self.get_x_padding() > (self._controller.get_screen_width()) / 2:
-            self._obj.setx((self._controller.get_screen_width() / 2) - self.get_x_padding())
-            # print("Too Right!")
-        elif self.get_xcor() - self.get_x_padding() < (self._controller.get_screen_width()) / (-2):
-            self._obj.setx(self.get_x_padding() - (self._controller.get_screen_width() / 2))
-            # print("Too Left!")
+        if self._xcor > self._max_xcor:
+            self._xcor = self._max_xcor
+        elif self._xcor < self._min_xcor:
+            self._xcor = self._min_xcor
 
         # Teleports player to new position based on the speed
-        self._obj.setx(self._obj.xcor() + self._speed_x)
-        self._obj.sety(self._obj.ycor() + self._speed_y)
-
-    # Checks is up/down/left/right key is pressed or released
-    def up_pressed(self):
-        self._up = True
-        # print("up pressed")
+        self._xcor += self._speed_x
+        self._ycor += self._speed_y
 
-    def up_released(self):
-        self._up = False
-        # print("up released")
-
-    def down_pressed(self):
-        self._down = True
-        # print("down pressed")
-        
-    def down_released(self):
-        self._down = False
-        # print("down released")
-
-    def left_pressed(self):
-        self._left = True
-        # print("left pressed")
-        
-    def left_released(self):
-        self._left = False
-        # print("left released")
-    
-    def right_pressed(self):
-        self._right = True
-        # print("right pressed")
+    # Keys held down as bits: 1 is up, 2 is down, 4 is left, 8 is right
+    def get_key_mask(self):
+        return self._key_mask
 
-    def right_released(self):
-        self._right = False
-        # print("right released")
+    def set_key_mask(self, key_mask):
+        self._key_mask = key_mask
 
     def execute(self):
         self.update_speed()
@@ -636,163 +1070,2586 @@ class Player(Sprite):
         return True
 
 
-class Item(Sprite):
-    """ Class containing attributes and functions relating to item sprites: crates, power-ups, obstacles, etc. """
-    def __init__(self, controller, start_xcor, name, item_data):
-        super().__init__(controller)
-    
+class KeySnapshot:
+    """ Keys held down during one tick, made once per tick by the input queue and not changed afterwards """
+    __slots__ = ("_tick", "_key_mask", "_event_count")
+
+    def __init__(self, tick, key_mask, event_count=0):
+        self._tick = tick
+        self._key_mask = key_mask
+
+        # Number of key events that arrived since the previous tick
+        self._event_count = event_count
+
+    # Getters
+    def get_tick(self):
+        return self._tick
+
+    def get_key_mask(self):
+        return self._key_mask
+
+    def get_event_count(self):
+        return self._event_count
+
+    def is_held(self, key):
+        return bool(self._key_mask & key)
+
+
+class InputQueue:
+    """ 
+    Key presses and releases from the window, kept in a ring buffer with the time they arrived 
+    Once per tick the events are turned into a key snapshot. A key pressed and released between two ticks still counts as 
+    held for one tick, so short taps are not lost. The time from each event to the frame that first showed it is kept 
+    """
+    # Key bits, the same as the key masks of replays and simulated players
+    UP, DOWN, LEFT, RIGHT = 1, 2, 4, 8
+    keys = {"Up": UP, "Down": DOWN, "Left": LEFT, "Right": RIGHT}
+
+    def __init__(self, capacity=64, window_size=240):
+        # Ring buffer of (time in nanoseconds, key bit, pressed), the oldest events are overwritten when it is full
+        self._events = [None] * capacity
+        self._capacity = capacity
+        self._start = 0
+        self._count = 0
+        self._dropped_events = 0
+
+        # Keys held down after the last event read
+        self._key_mask = 0
+
+        # Times of the events read since the last frame was shown, and the latency of every event shown
+        self._undisplayed_times = []
+        self._latencies = []
+        self._recent_latencies = collections.deque(maxlen=window_size)
+
+    # Getters
+    def get_pending_count(self):
+        return self._count
+
+    def get_dropped_events(self):
+        return self._dropped_events
+
+    def get_latencies(self):
+        # Nanoseconds from each key event to the end of the frame that first showed it
+        return self._latencies
+
+    def get_recent_latencies(self):
+        return list(self._recent_latencies)
+
+    # Functions
+    def push(self, key, pressed):
+        # Called by the window for every key press and release
+        if self._count == self._capacity:
+            self._start = (self._start + 1) % self._capacity
+            self._count -= 1
+            self._dropped_events += 1
+        self._events[(self._start + self._count) % self._capacity] = (time.perf_counter_ns(), key, pressed)
+        self._count += 1
+
+    def listen(self, screen):
+        # Every key is given a press and a release callback, which only add an event to the buffer
+        for name, key in InputQueue.keys.items():
+            screen.onkeypress(functools.partial(self.push, key, True), name)
+            screen.onkeyrelease(functools.partial(self.push, key, False), name)
+        screen.listen()
+
+    def take_snapshot(self, tick):
+        # Reads every waiting event, keys pressed at any point since the last tick are held in this tick
+        pressed_keys = 0
+        event_count = self._count
+        for i in range(event_count):
+            event_time, key, pressed = self._events[self._start]
+            self._events[self._start] = None
+            self._start = (self._start + 1) % self._capacity
+            if pressed:
+                self._key_mask |= key
+                pressed_keys |= key
+            else:
+                self._key_mask &= ~key
+            self._undisplayed_times.append(event_time)
+        self._count = 0
+        return KeySnapshot(tick, self._key_mask | pressed_keys, event_count)
+
+    def mark_displayed(self):
+        # Called after each frame is shown, the events read before it have now reached the screen
+        if not self._undisplayed_times:
+            return
+        now = time.perf_counter_ns()
+        for event_time in self._undisplayed_times:
+            self._latencies.append(now - event_time)
+            self._recent_latencies.append(now - event_time)
+        self._undisplayed_times = []
+
+
+class ItemType:
+    """ 
+    Data of one kind of item from an item stats file, shared by every item of that kind 
+    Item types are not changed after they are made; with_changes makes a changed copy instead 
+    """
+    __slots__ = ("_name", "_shape", "_x_padding", "_y_padding", "_stress", "_health", "_grades", "_speed", "_weight", "_max_concurrent")
+
+    # Columns of the item stats files after the item name, the last two are optional
+    columns = ["x-pad", "y-pad", "stress", "health", "grades", "x-speed", "weight", "max-concurrent"]
+    required_columns = columns[:6]
+
+    def __init__(self, name, x_padding, y_padding, stress, health, grades, speed, weight=1, max_concurrent=0):
         self._name = name
-        self._x_padding = item_data[0]
-        self._y_padding = item_data[1]
-
-        # Turtle initialisations
-        self._obj.shape(f"{name}.gif")
-        self._start_xcor = start_xcor
-
-        # Game data
-        self._stress = item_data[2]
-        self._health = item_data[3]
-        self._grades = item_data[4]
-        self._base_speed = item_data[5]
-
-        # Starting position
-        self._obj.goto(
-            # Start outside of screen
-            self._start_xcor,
-            # Randomise y coordinate of starting object position
-            random.randint(
-                (-self._controller.get_screen_height() // 2) + 30,
-                (self._controller.get_screen_height() // 2) - 200
-            )
-        )
+        self._shape = f"{name}.gif"
+        self._x_padding = x_padding
+        self._y_padding = y_padding
+        self._stress = stress
+        self._health = health
+        self._grades = grades
+
+        # Items of this kind move at this speed, give or take 1
+        self._speed = speed
 
-        # Randomise speed
-        self._speed = random.randint(self._base_speed - 1, self._base_speed + 1)
+        # How often the item is picked compared to other items, and the most alive at once, 0 for no limit
+        self._weight = weight
+        self._max_concurrent = max_concurrent
 
     # Getters
     def get_name(self):
         return self._name
-    
+
+    def get_shape(self):
+        return self._shape
+
+    def get_x_padding(self):
+        return self._x_padding
+
+    def get_y_padding(self):
+        return self._y_padding
+
     def get_stress(self):
         return self._stress
 
     def get_health(self):
         return self._health
-    
+
     def get_grades(self):
         return self._grades
 
+    def get_speed(self):
+        return self._speed
+
+    def get_weight(self):
+        return self._weight
+
+    def get_max_concurrent(self):
+        return self._max_concurrent
+
+    def get_values(self):
+        # Values in the order of the item stats columns
+        return [self._x_padding, self._y_padding, self._stress, self._health, self._grades, self._speed, self._weight, self._max_concurrent]
+
+    # Functions
+    def with_changes(self, changes):
+        # Returns a copy with some columns changed, such as {"stress": -3}
+        values = dict(zip(ItemType.columns, self.get_values()))
+        for column, value in changes.items():
+            if column not in values:
+                raise ValueError(f"Item stats files have no column called {column}")
+            values[column] = value
+        return ItemType(self._name, *[values[column] for column in ItemType.columns])
+
+
+class Item(Sprite):
+    """ Class containing attributes and functions relating to item sprites: crates, power-ups, obstacles, etc. """
+    __slots__ = ("_type", "_out_xcor")
+
+    def __init__(self, item_type, start_xcor, start_ycor, speed, screen_width):
+        super().__init__(item_type.get_shape(), item_type.get_x_padding(), item_type.get_y_padding(), speed)
+
+        # Name and stats are read from the item type, which is shared by every item of the same kind
+        self._type = item_type
+
+        # The item is out of the screen once it is left of this x coordinate
+        self._out_xcor = - (screen_width // 2 + self._x_padding + 10)
+
+        # Start outside of screen
+        self.teleport(start_xcor, start_ycor)
+
+    # Getters
+    def get_type(self):
+        return self._type
+
+    def get_name(self):
+        return self._type.get_name()
+    
+    def get_stress(self):
+        return self._type.get_stress()
+
+    def get_health(self):
+        return self._type.get_health()
+    
+    def get_grades(self):
+        return self._type.get_grades()
+
     # Functions / Procedures
+    def set_tick_xcor(self, prev_xcor, xcor):
+        # Used by the item store, which moves the items when NumPy is available
+        self._prev_xcor = prev_xcor
+        self._xcor = xcor
+
     def move(self):
         # Shift obstacle x coordinate by speed units
-        self._obj.setx(self._obj.xcor() - self._speed)
+        self._xcor -= self._speed
         
     def is_out(self):
         # Check if x coordinate of obstacle is out of screen
-        if (self._obj.xcor() < - (self._controller.get_screen_width() // 2 + self._x_padding + 10 )):
-            # print(f"Object {self} out of screen.")
-            return True
-        else:
-            return False
-    
-    def kill(self):
-        """
-        Not sure if this actually kills the object and takes it out of memory, or is the only way screen.clear()?
-        screen.clear() would kill all other objects though :/
-        """
-        self._obj.clear()
-        self._obj.hideturtle()
-        del self._obj
-        del self
-        # print(f"Object {self} killed.")
+        return self._xcor < self._out_xcor
 
     def execute(self):
         if self.is_out():
             return False
         else:
+            self.save_position()
             self.move()
             return True
 
 
-class Display:
-    """ Updates the game display """
-    def __init__(self):
-        pass
+class SpriteRenderer:
+    """ 
+    Draws sprites with the sprites of the backend, canvas images in a turtle window. Each sprite added gets one from the 
+    sprite pool, which goes back to the pool when the sprite is removed. Shapes are only changed when they change, and 
+    every sprite that moved since the last frame is moved in one call to the backend when the frame is flushed 
+    """
+    def __init__(self, backend, sprite_pool):
+        self._backend = backend
+        self._sprite_pool = sprite_pool
 
-    def execute(self):
-        turtle.update()
-        return True
-    
+        # [backend sprite, shape drawn, position drawn] of each sprite
+        self._drawn = {}
+
+        # (backend sprite, xcor, ycor) of every sprite moved in the current frame
+        self._moves = []
+
+    # Getters
+    def get_sprite_pool(self):
+        return self._sprite_pool
 
-class Delay:
-    """ Normalises execution speed of game across different devices and ensures game is run at relatively constant speed """
+    def get_count(self):
+        return len(self._drawn)
+
+    # Functions
+    def add(self, sprite):
+        backend_sprite = self._sprite_pool.acquire()
+        self._backend.set_sprite_shape(backend_sprite, sprite.get_shape())
+        self._backend.move_sprites([(backend_sprite, sprite.get_xcor(), sprite.get_ycor())])
+        self._backend.set_sprite_visible(backend_sprite, True)
+        self._drawn[sprite] = [backend_sprite, sprite.get_shape(), sprite.get_location()]
+
+    def remove(self, sprite):
+        self._sprite_pool.release(self._drawn.pop(sprite)[0])
+
+    def draw(self, sprites, alpha):
+        for sprite in sprites:
+            drawn = self._drawn[sprite]
+            shape = sprite.get_shape()
+            if shape != drawn[1]:
+                self._backend.set_sprite_shape(drawn[0], shape)
+                drawn[1] = shape
+
+            position = sprite.get_draw_position(alpha)
+            if position != drawn[2]:
+                self._moves.append((drawn[0], position[0], position[1]))
+                drawn[2] = position
+
+    def move(self, sprites, xcors, ycors):
+        # Moves sprites to draw positions worked out by the caller, used by the item store
+        for sprite, xcor, ycor in zip(sprites, xcors, ycors):
+            drawn = self._drawn[sprite]
+            position = (xcor, ycor)
+            self._moves.append((drawn[0], xcor, ycor))
+            drawn[2] = position
+
+    def flush(self):
+        # Sends the moves of the frame to the backend
+        self._backend.move_sprites(self._moves)
+        self._moves = []
+
+
+class StatsDisplay:
+    """ 
+    Shows the value of each stat next to its icon 
+    Each stat has a single text item which is only changed when the value of that stat changes 
+    """
     def __init__(self, controller):
         self._controller = controller
-        self._prev_time = time.time()
 
-    def execute(self):
-        # Sleeps for remaining duration of frame
-        # If one frame is set to 10 seconds and all other operations are completed in 7 seconds, delay sleeps for 3 seconds
-        now = time.time()
-        sleep_time = 1/self._controller.get_game_fps() - (now - self._prev_time)
-
-        if sleep_time > 0:
-            time.sleep(sleep_time)
-            self._prev_time = now + sleep_time
-        else:
-            self._prev_time = now
-        return True
-        
+        # Height of each stat below the top of the screen, in the same order as the icons
+        self._stat_offsets = {"Grades": 72, "Health": 142, "Stress": 212}
 
-class EndScreen(GameInitialisation):
-    """ Class containing functions related to end screen """
-    def __init__(self, final_game_stats):
-        super().__init__()
-        self._final_games_stats = final_game_stats
+        self._text_items = {}
+        self._shown_values = {}
 
-    def execute(self):
-        # Starts turtle screen instance
-        super().execute()
-        
-        # Display end screen
-        self._screen.bgpic("Results_Page.gif")
+        # Number of times the text of a stat was changed
+        self._redraws = 0
 
-        # 
-        if self._final_games_stats["Stress"] > self._stat_high_threshold:
-            scale1, stress_msg = 'high,', 'perhaps \nyou should take care of yourself mentally!'
-        elif self._final_games_stats["Stress"] < self._stat_low_threshold:
-            scale1, stress_msg = 'low,', '\ngood job maintaining it this low!'
+    # Getters
+    def get_redraws(self):
+        return self._redraws
+
+    # Functions
+    def show(self, game_stats):
+        backend = self._controller.get_backend()
+        xcor = - (self._controller.get_screen_width() / 2) + 100
+        for stat, offset in self._stat_offsets.items():
+            ycor = (self._controller.get_screen_height() / 2) - offset
+            self._text_items[stat] = backend.create_text(xcor, ycor, game_stats[stat], "left", self._controller._stats_font, "navy")
+            self._shown_values[stat] = game_stats[stat]
+
+    def update(self, game_stats):
+        backend = self._controller.get_backend()
+        for stat, text_item in self._text_items.items():
+            if game_stats[stat] != self._shown_values[stat]:
+                backend.set_text(text_item, game_stats[stat])
+                self._shown_values[stat] = game_stats[stat]
+                self._redraws += 1
+
+    def hide(self):
+        backend = self._controller.get_backend()
+        for text_item in self._text_items.values():
+            backend.delete_text(text_item)
+        self._text_items = {}
+        self._shown_values = {}
+
+
+class Animation:
+    """ 
+    Frame table of one animation: the shape of each frame, and the time each frame ends at 
+    Frames are listed as images, or cut from a sprite sheet left to right and top to bottom 
+    """
+    def __init__(self, config):
+        if "sheet" in config:
+            self._frame_shapes = [f"{config['sheet']}#{index}" for index in range(config["count"])]
         else:
-            scale1, stress_msg = 'neutral,', '\nkeep it up!'
+            self._frame_shapes = list(config["frames"])
+
+        # Seconds each frame is shown for, frames without a duration are shown for 0.1 seconds
+        # Times are kept in whole microseconds so that durations like 0.1 add up exactly
+        durations = config.get("durations", [])
+        self._frame_end_times = []
+        end_time = 0
+        for index in range(len(self._frame_shapes)):
+            end_time += round((durations[index] if index < len(durations) else 0.1) * 1000000)
+            self._frame_end_times.append(end_time)
+        self._duration = end_time
 
-        if self._final_games_stats["Health"] > self._stat_high_threshold:
+    # Getters
+    def get_frame_shapes(self):
+        return self._frame_shapes
+
+    def get_frame_index(self, seconds):
+        # Index of the frame shown at this time, the animation repeats
+        return bisect.bisect_right(self._frame_end_times, round(seconds * 1000000) % self._duration)
+
+    def get_frame_shape(self, index):
+        return self._frame_shapes[index]
+
+
+class Animator:
+    """ 
+    Changes the frames of animated sprites by the time elapsed in the game 
+    Sprites with the same animation share one frame, so each frame only looks up the current frame once per animation, 
+    and sprites only change shape when the frame changes 
+    """
+    def __init__(self, config):
+        # Animations by name, each read from the animations file once
+        self._config = config
+        self._animations = {}
+
+        # Sprites of each animation, and the index of the frame they are showing
+        self._sprites = {}
+        self._frame_indexes = {}
+
+    # Getters
+    def get_animation(self, name):
+        if name not in self._animations:
+            self._animations[name] = Animation(self._config[name])
+        return self._animations[name]
+
+    # Functions
+    def add(self, sprite, name):
+        animation = self.get_animation(name)
+        self._sprites.setdefault(animation, []).append(sprite)
+        self._frame_indexes.setdefault(animation, None)
+
+    def remove(self, sprite, name):
+        self._sprites[self.get_animation(name)].remove(sprite)
+
+    def update(self, seconds):
+        for animation, sprites in self._sprites.items():
+            frame_index = animation.get_frame_index(seconds)
+            if frame_index != self._frame_indexes[animation]:
+                self._frame_indexes[animation] = frame_index
+                shape = animation.get_frame_shape(frame_index)
+                for sprite in sprites:
+                    sprite.set_shape(shape)
+
+
+class TextCache:
+    """ 
+    Keeps text written on screen so that each text is only laid out once 
+    Each distinct text, position, font and colour is written once and hidden; showing or hiding it afterwards only changes whether it is visible 
+    """
+    def __init__(self, backend):
+        self._backend = backend
+
+        # Text items by (xcor, ycor, text, align, font, color)
+        self._text_items = {}
+
+    # Getters
+    def get_count(self):
+        return len(self._text_items)
+
+    # Functions
+    def prepare(self, xcor, ycor, text, align, font, color):
+        # Writes the text hidden if it has not been written yet, and returns its text item
+        key = (xcor, ycor, text, align, font, color)
+        if key not in self._text_items:
+            text_item = self._backend.create_text(xcor, ycor, text, align, font, color)
+            self._backend.set_text_visible(text_item, False)
+            self._text_items[key] = text_item
+        return self._text_items[key]
+
+    def show(self, xcor, ycor, text, align, font, color):
+        self._backend.set_text_visible(self.prepare(xcor, ycor, text, align, font, color), True)
+
+    def hide(self, xcor, ycor, text, align, font, color):
+        self._backend.set_text_visible(self.prepare(xcor, ycor, text, align, font, color), False)
+
+
+class SpritePool:
+    """ 
+    Keeps hidden sprites of the backend for items to reuse, so that spawning an item does not create a new canvas image 
+    At most max_size sprites are kept; the pool counts how often a sprite could be reused (hit) or had to be created (miss) 
+    """
+    def __init__(self, backend, max_size, preload=0):
+        self._backend = backend
+        self._max_size = max_size
+        self._free = []
+        self._hits = 0
+        self._misses = 0
+
+        self.preload(preload)
+
+    # Getters
+    def get_hits(self):
+        return self._hits
+
+    def get_misses(self):
+        return self._misses
+
+    def get_free_count(self):
+        return len(self._free)
+
+    # Functions
+    def preload(self, count):
+        # Creates hidden sprites ahead of time, up to the size of the pool
+        for i in range(min(count, self._max_size - len(self._free))):
+            self._free.append(self._backend.create_sprite())
+
+    def acquire(self):
+        # Returns a hidden sprite, the shape and position are set by the sprite renderer
+        if self._free:
+            self._hits += 1
+            return self._free.pop()
+
+        self._misses += 1
+        return self._backend.create_sprite()
+
+    def release(self, sprite):
+        self._backend.set_sprite_visible(sprite, False)
+        if len(self._free) < self._max_size:
+            self._free.append(sprite)
+        else:
+            self._backend.delete_sprite(sprite)
+
+
+class ItemStore:
+    """ 
+    Holds all live items. With NumPy and enough items, item positions, paddings and speeds are kept in arrays so that 
+    movement, removal of items out of the screen, collision checks and drawing each run once per frame for all items 
+    With only a few items each NumPy call costs more than looping over the items, so the items move themselves instead 
+    until there are array_threshold items, and again once there are fewer than half as many 
+    """
+    def __init__(self, controller, capacity, array_threshold=32):
+        self._controller = controller
+        self._capacity = capacity
+        self._array_threshold = array_threshold
+
+        # Items in the order they were spawned
+        self._items = []
+
+        # Whether the arrays below hold the positions of the items, instead of the items themselves
+        self._use_arrays = False
+
+        # Item data columns, only the first len(self._items) rows are in use
+        if np is not None:
+            self._xcor = np.zeros(capacity)
+            self._prev_xcor = np.zeros(capacity)
+            self._ycor = np.zeros(capacity)
+            self._x_padding = np.zeros(capacity)
+            self._y_padding = np.zeros(capacity)
+            self._speed = np.zeros(capacity)
+
+            # x coordinate each item was last drawn at; items only move along the x axis
+            self._drawn_xcor = np.zeros(capacity)
+
+    # Getters
+    def get_items(self):
+        return self._items
+
+    def is_empty(self):
+        return len(self._items) == 0
+
+    def is_full(self):
+        return len(self._items) >= self._capacity
+
+    def get_count(self):
+        return len(self._items)
+
+    def uses_arrays(self):
+        return self._use_arrays
+
+    def clear(self):
+        # Removes every item
+        for item in self._items:
+            self._controller.remove_item(item)
+        self._items = []
+
+    # Functions
+    def add(self, item):
+        if not self._use_arrays and np is not None and len(self._items) + 1 >= self._array_threshold:
+            self.start_arrays()
+        if self._use_arrays:
+            self.set_row(len(self._items), item)
+            self._drawn_xcor[len(self._items)] = item.get_xcor()
+        self._items.append(item)
+
+    def set_row(self, index, item):
+        # Copies the data of the item into a row of the arrays
+        self._xcor[index] = item.get_xcor()
+        self._prev_xcor[index] = item.get_positions()[0]
+        self._ycor[index] = item.get_ycor()
+        self._x_padding[index] = item.get_x_padding()
+        self._y_padding[index] = item.get_y_padding()
+        self._speed[index] = item.get_speed()
+
+    def start_arrays(self):
+        # The arrays take over the positions of the items. Where the items were last drawn is not known,
+        # so they are all moved the next time they are drawn
+        for index, item in enumerate(self._items):
+            self.set_row(index, item)
+        self._drawn_xcor[:len(self._items)] = np.nan
+        self._use_arrays = True
+
+    def stop_arrays(self):
+        # The items take back their positions from the arrays
+        self.sync_items()
+        self._use_arrays = False
+
+    def choose_storage(self):
+        # Called at the start of every tick, switches to the items moving themselves when there are few items left
+        if self._use_arrays and len(self._items) < self._array_threshold // 2:
+            self.stop_arrays()
+
+    def remove_items(self, keep):
+        # Removes the items not kept and moves the rows of the remaining items to the front of the arrays
+        count = len(self._items)
+        for index in np.flatnonzero(~keep).tolist():
+            self._controller.remove_item(self._items[index])
+
+        keep_indexes = np.flatnonzero(keep)
+        self._items = [self._items[index] for index in keep_indexes.tolist()]
+        for column in (self._xcor, self._prev_xcor, self._ycor, self._x_padding, self._y_padding, self._speed, self._drawn_xcor):
+            column[:len(self._items)] = column[:count][keep_indexes]
+
+    def move_items(self):
+        # Removes items out of the screen, then moves the rest left by their speed
+        self.choose_storage()
+        if not self._use_arrays:
+            moved_items = []
+            for item in self._items:
+                if item.execute():
+                    moved_items.append(item)
+                else:
+                    self._controller.remove_item(item)
+            self._items = moved_items
+            return
+
+        count = len(self._items)
+        screen_edge = self._controller.get_screen_width() // 2
+        inside = self._xcor[:count] >= -(screen_edge + self._x_padding[:count] + 10)
+        if not inside.all():
+            self.remove_items(inside)
+
+        count = len(self._items)
+        self._prev_xcor[:count] = self._xcor[:count]
+        self._xcor[:count] -= self._speed[:count]
+
+    def check_collisions(self):
+        # Items colliding with the player are collected in the order they were spawned and removed
+        player = self._controller.get_player()
+        collision_system = self._controller.get_collision_system()
+
+        if not self._use_arrays:
+            collided_items = collision_system.find_collisions(player, self._items)
+            alive_items = []
+            for item in self._items:
+                if item in collided_items:
+                    self._controller.collect_item(item)
+                    self._controller.remove_item(item)
+                else:
+                    alive_items.append(item)
+            self._items = alive_items
+            return
+
+        # Integer bounds are truncated the same way as CollisionSystem.get_bounds
+        player_bounds = collision_system.get_bounds(player)
+        if collision_system.is_empty_bounds(player_bounds):
+            return
+        player_left, player_right, player_bottom, player_top = player_bounds
+        count = len(self._items)
+        xcor = self._xcor[:count]
+        ycor = self._ycor[:count]
+        x_padding = self._x_padding[:count]
+        y_padding = self._y_padding[:count]
+        left = (xcor - x_padding).astype(np.int64)
+        right = (xcor + x_padding + 1).astype(np.int64) - 1
+        bottom = (ycor - y_padding).astype(np.int64)
+        top = (ycor + y_padding + 1).astype(np.int64) - 1
+        collided = (
+            (left <= right) & (bottom <= top)
+            & (left <= player_right) & (right >= player_left)
+            & (bottom <= player_top) & (top >= player_bottom)
+        )
+
+        if collided.any():
+            for index in np.flatnonzero(collided).tolist():
+                self._controller.collect_item(self._items[index])
+            self.remove_items(~collided)
+
+    def draw(self, renderer, alpha):
+        # Draws every item in between its last two positions
+        if not self._use_arrays:
+            renderer.draw(self._items, alpha)
+            return
+
+        # Draw positions are worked out for all items at once, and only the items that moved since they were last drawn
+        # are passed to the renderer. Items are not animated, so their shapes never change
+        count = len(self._items)
+        prev_xcor = self._prev_xcor[:count]
+        draw_xcor = prev_xcor + (self._xcor[:count] - prev_xcor) * alpha
+        moved = np.flatnonzero(draw_xcor != self._drawn_xcor[:count])
+        if len(moved):
+            self._drawn_xcor[:count] = draw_xcor
+            items = self._items
+            renderer.move([items[index] for index in moved.tolist()], draw_xcor[moved].tolist(), self._ycor[moved].tolist())
+
+    def sync_items(self):
+        # Returns all live items with their positions up to date, such as to be saved in a snapshot
+        if not self._use_arrays:
+            return self._items
+
+        # The items only learn their position from the arrays when drawn
+        count = len(self._items)
+        for item, prev_xcor, xcor in zip(self._items, self._prev_xcor[:count].tolist(), self._xcor[:count].tolist()):
+            item.set_tick_xcor(prev_xcor, xcor)
+        return self._items
+
+
+class Timeline:
+    """ 
+    Stages and events of a game, read from the timeline file 
+    Every event runs through the same cycle of stages, then the game ends. The timeline is compiled into actions sorted by 
+    the tick they run on, so the game only has to compare the current tick with the tick of the next action 
+    """
+    def __init__(self, config):
+        # Each stage: stage name, duration in seconds, spawn rate in frames, and optionally items, music and instructions
+        # Items and music set to "event" are taken from the event of the cycle
+        self._stages = config["stages"]
+
+        # Each event: event name, and optionally items, music, spawn rate for its stages with event items, and whether it is a bonus
+        self._events = config["events"]
+
+        # Music and instructions once the last event has ended
+        self._ending = config.get("ending", {})
+
+    # Getters
+    def get_duration(self):
+        # Seconds until the game starts ending
+        return len(self._events) * sum(stage["duration"] for stage in self._stages)
+
+    # Functions
+    def with_changes(self, changes):
+        # Returns a copy of the timeline with some stages and events changed, found by name,
+        # such as {"stages": {"Normal": {"spawn_rate": 30}}, "events": {"Recess": {"spawn_rate": 10}}}
+        config = {
+            "stages": [dict(stage) for stage in self._stages],
+            "events": [dict(event) for event in self._events],
+            "ending": dict(self._ending)
+        }
+        for part, key in (("stages", "stage"), ("events", "event")):
+            for name, fields in changes.get(part, {}).items():
+                entries = [entry for entry in config[part] if entry[key] == name]
+                if not entries:
+                    raise ValueError(f"The timeline has no {key} called {name}")
+                for entry in entries:
+                    entry.update(fields)
+        return Timeline(config)
+
+    def find_items(self, items, item_tables):
+        # Items can be a whole item table by name, or a list of item names from any table
+        if isinstance(items, str):
+            return list(item_tables[items].values())
+
+        found_items = []
+        for name in items:
+            tables = [item_table for item_table in item_tables.values() if name in item_table]
+            if not tables:
+                raise ValueError(f"Item {name} in the timeline is not in any item stats file")
+            found_items.append(tables[0][name])
+        return found_items
+
+    def get_spawn_table(self, items, item_tables, spawn_tables):
+        # Stages spawning the same items share one spawn table, stages without items have none
+        if items is None:
+            return None
+        key = items if isinstance(items, str) else tuple(items)
+        if key not in spawn_tables:
+            spawn_tables[key] = SpawnTable(self.find_items(items, item_tables))
+        return spawn_tables[key]
+
+    def compile(self, controller):
+        tick_rate = controller.get_game_fps()
+        item_tables = controller.get_item_tables()
+        spawn_tables = {}
+        actions = []
+
+        seconds = 0
+        for event in self._events:
+            for stage in self._stages:
+                items = stage.get("items")
+                spawn_rate = stage["spawn_rate"]
+                if items == "event":
+                    items = event.get("items")
+                    spawn_rate = event.get("spawn_rate", spawn_rate)
+
+                music = stage.get("music")
+                if music == "event":
+                    music = event.get("music")
+
+                actions.append(TimelineAction(
+                    round(seconds * tick_rate), stage["stage"], event["event"], spawn_rate, self.get_spawn_table(items, item_tables, spawn_tables),
+                    music, stage.get("loop", False), stage.get("instructions"), event.get("bonus", False)
+                ))
+                seconds += stage["duration"]
+
+        actions.append(TimelineAction(
+            round(seconds * tick_rate), "Ending", None, None, None,
+            self._ending.get("music"), self._ending.get("loop", False), self._ending.get("instructions", "hide"), False, ending=True
+        ))
+
+        # Sorting keeps actions on the same tick in the order they were listed
+        actions.sort(key=lambda action: action.get_tick())
+        return actions
+
+
+class SpawnTable:
+    """ 
+    Picks a random item out of a list of items, in proportion to the weight of each item 
+    Uses Walker's alias method: the table is built once, then each pick takes one random number and creates no lists 
+    """
+    def __init__(self, items):
+        # Item type of each item
+        self._items = items
+        self._count = len(items)
+
+        weights = [item_type.get_weight() for item_type in items]
+        if not items or sum(weights) <= 0:
+            raise ValueError(f"Spawn table needs at least one item with a weight above 0: {[item_type.get_name() for item_type in items]}")
+
+        # Each item gets a column of height 1. An item keeps the part of its column below its keep chance,
+        # and the rest of the column is given to its alias, an item with more than its share of the weight
+        scaled_weights = [weight * self._count / sum(weights) for weight in weights]
+        self._keep_chances = [1.0] * self._count
+        self._aliases = list(range(self._count))
+
+        small = [index for index, weight in enumerate(scaled_weights) if weight < 1]
+        large = [index for index, weight in enumerate(scaled_weights) if weight >= 1]
+        while small and large:
+            small_index = small.pop()
+            large_index = large.pop()
+            self._keep_chances[small_index] = scaled_weights[small_index]
+            self._aliases[small_index] = large_index
+            scaled_weights[large_index] -= 1 - scaled_weights[small_index]
+            if scaled_weights[large_index] < 1:
+                small.append(large_index)
+            else:
+                large.append(large_index)
+
+    # Getters
+    def get_items(self):
+        return self._items
+
+    def get_chance(self, index):
+        # Chance of picking the item at this index, worked out from the table
+        chance = self._keep_chances[index]
+        for column, alias in enumerate(self._aliases):
+            if alias == index and column != index:
+                chance += 1 - self._keep_chances[column]
+        return chance / self._count
+
+    # Functions
+    def pick(self, rng):
+        # Returns the item type of a random item, a table with one item does not use a random number
+        if self._count == 1:
+            return self._items[0]
+
+        position = rng.random() * self._count
+        index = int(position)
+        if position - index >= self._keep_chances[index]:
+            index = self._aliases[index]
+        return self._items[index]
+
+
+class TimelineAction:
+    """ Start of a stage at a tick of the game: the stage, its spawn rate and items, and the music and instructions to change """
+    def __init__(self, tick, stage, event, spawn_rate, spawn_table, music, music_looped, instructions, bonus, ending=False):
+        self._tick = tick
+        self._stage = stage
+        self._event = event
+        self._spawn_rate = spawn_rate
+
+        # Picks the items spawned in the stage, None if no items spawn
+        self._spawn_table = spawn_table
+
+        self._music = music
+        self._music_looped = music_looped
+
+        # "show" to warn about the event, "hide" to remove the warning, or None
+        self._instructions = instructions
+        self._bonus = bonus
+        self._ending = ending
+
+    # Getters
+    def get_tick(self):
+        return self._tick
+
+    def get_stage(self):
+        return self._stage
+
+    def get_event(self):
+        return self._event
+
+    def get_spawn_rate(self):
+        return self._spawn_rate
+
+    def get_spawn_table(self):
+        return self._spawn_table
+
+    def get_music(self):
+        return self._music
+
+    def is_music_looped(self):
+        return self._music_looped
+
+    def get_instructions(self):
+        return self._instructions
+
+    def is_bonus(self):
+        return self._bonus
+
+    def is_ending(self):
+        return self._ending
+
+
+class FrameScheduler:
+    """ 
+    Runs the game loop until stopped. Each frame runs the tick phases as many times as the frame pacer says are due, 
+    then the frame phases once. Without a frame pacer every frame runs exactly one tick 
+    """
+    def __init__(self, pacer=None, profiler=None):
+        self._pacer = pacer
+
+        # If set, the time taken by every phase is recorded
+        self._profiler = profiler
+
+        # Lists of (name, function) pairs
+        self._tick_phases = []
+        self._frame_phases = []
+        self._running = False
+
+    # Getters
+    def get_phase_names(self):
+        return [name for name, function in self._tick_phases + self._frame_phases]
+
+    def is_running(self):
+        return self._running
+
+    def get_alpha(self):
+        # How far the current frame is between the last tick and the next one
+        if self._pacer is None:
+            return 1
+        return self._pacer.get_alpha()
+
+    # Functions
+    def add_tick_phase(self, name, function):
+        self._tick_phases.append((name, function))
+
+    def add_frame_phase(self, name, function):
+        self._frame_phases.append((name, function))
+
+    def stop(self):
+        # The rest of the current frame is skipped
+        self._running = False
+
+    def run_phase(self, name, function):
+        if self._profiler is None:
+            function()
+            return
+        start_time = time.perf_counter_ns()
+        function()
+        self._profiler.add_phase_time(name, time.perf_counter_ns() - start_time)
+
+    def run_tick(self):
+        for name, function in self._tick_phases:
+            self.run_phase(name, function)
+            if not self._running:
+                return
+
+    def run_frame(self):
+        ticks = 1 if self._pacer is None else self._pacer.get_due_ticks()
+        for i in range(ticks):
+            self.run_tick()
+            if not self._running:
+                return
+
+        for name, function in self._frame_phases:
+            self.run_phase(name, function)
+
+        if self._profiler is not None:
+            missed_deadline = self._pacer is not None and self._pacer.missed_last_frame()
+            self._profiler.end_frame(ticks, missed_deadline)
+
+    def start(self):
+        self._running = True
+        if self._pacer is not None:
+            self._pacer.start()
+
+    def run(self):
+        self.start()
+        while self._running:
+            self.run_frame()
+
+
+class FrameProfiler:
+    """ 
+    Records the time taken by each phase of every frame, whether the frame missed its deadline and the number of items alive 
+    Percentiles of the last few frames are kept for the performance overlay, and all frames can be exported to CSV and JSON 
+    """
+    def __init__(self, count_items, window_size=240):
+        self._count_items = count_items
+
+        # Phase names in the order they were first run
+        self._phase_names = []
+
+        # Nanoseconds spent in each phase in the current frame, phases run once per tick are added up
+        self._current_frame = {}
+
+        # One row per frame: (ticks, item count, missed deadline, {phase: nanoseconds})
+        self._frames = []
+        self._missed_deadlines = 0
+
+        # Total time of the most recent frames
+        self._recent_frame_times = collections.deque(maxlen=window_size)
+
+        # Nanoseconds from each key event to the frame that showed it, given by the input queue when the game ends
+        self._input_latencies = []
+
+        # (frame, level) of every change of the quality level, given by the quality governor when the game ends
+        self._quality_changes = []
+
+    # Getters
+    def get_phase_names(self):
+        return self._phase_names
+
+    def get_frame_count(self):
+        return len(self._frames)
+
+    def get_missed_deadlines(self):
+        return self._missed_deadlines
+
+    def get_recent_percentile(self, fraction):
+        # Frame time in nanoseconds that the given fraction of recent frames are faster than
+        return self.percentile(list(self._recent_frame_times), fraction)
+
+    # Functions
+    def set_input_latencies(self, latencies):
+        self._input_latencies = latencies
+
+    def set_quality_changes(self, quality_changes):
+        self._quality_changes = quality_changes
+
+    def percentile(self, values, fraction):
+        if not values:
+            return 0
+        values = sorted(values)
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    def add_phase_time(self, name, nanoseconds):
+        if name not in self._current_frame:
+            if name not in self._phase_names:
+                self._phase_names.append(name)
+            self._current_frame[name] = 0
+        self._current_frame[name] += nanoseconds
+
+    def end_frame(self, ticks, missed_deadline):
+        self._frames.append((ticks, self._count_items(), missed_deadline, self._current_frame))
+        self._recent_frame_times.append(sum(self._current_frame.values()))
+        if missed_deadline:
+            self._missed_deadlines += 1
+        self._current_frame = {}
+
+    def get_summary(self):
+        # Milliseconds per frame for each phase: mean, median, 99th percentile and max
+        summary = {
+            "frames": len(self._frames),
+            "ticks": sum(frame[0] for frame in self._frames),
+            "missed_deadlines": self._missed_deadlines,
+            "max_items": max((frame[1] for frame in self._frames), default=0),
+            "phases": {}
+        }
+        latencies = [latency / 1e6 for latency in self._input_latencies]
+        summary["input_latency"] = {
+            "events": len(latencies),
+            "p50_ms": self.percentile(latencies, 0.5),
+            "p99_ms": self.percentile(latencies, 0.99),
+            "max_ms": max(latencies, default=0)
+        }
+        summary["quality_changes"] = [{"frame": frame, "level": level} for frame, level in self._quality_changes]
+        for name in self._phase_names + ["Total"]:
+            if name == "Total":
+                times = [sum(frame[3].values()) / 1e6 for frame in self._frames]
+            else:
+                times = [frame[3].get(name, 0) / 1e6 for frame in self._frames]
+            summary["phases"][name] = {
+                "mean_ms": sum(times) / len(times) if times else 0,
+                "p50_ms": self.percentile(times, 0.5),
+                "p99_ms": self.percentile(times, 0.99),
+                "max_ms": max(times, default=0)
+            }
+        return summary
+
+    def export_csv(self, filename):
+        # One row per frame, phase times in milliseconds
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "ticks", "items", "missed_deadline"] + [f"{name}_ms" for name in self._phase_names] + ["total_ms"])
+            for index, (ticks, item_count, missed_deadline, phase_times) in enumerate(self._frames):
+                times = [phase_times.get(name, 0) / 1e6 for name in self._phase_names]
+                writer.writerow([index, ticks, item_count, int(missed_deadline)] + [f"{time_ms:.4f}" for time_ms in times] + [f"{sum(times):.4f}"])
+
+    def export_json(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.get_summary(), f, indent=2)
+
+
+class PerformanceOverlay:
+    """ Shows the frame rate, frame time percentiles, missed deadlines and item count in a corner of the screen """
+    def __init__(self, controller, profiler, update_interval=60):
+        self._controller = controller
+        self._profiler = profiler
+        self._text_item = None
+
+        # Number of frames between updates of the text
+        self._update_interval = update_interval
+
+    def show(self):
+        xcor = (self._controller.get_screen_width() / 2) - 10
+        ycor = (self._controller.get_screen_height() / 2) - 30
+        self._text_item = self._controller.get_backend().create_text(xcor, ycor, "", "right", ('Consolas', 12, 'bold'), "black")
+
+    def update(self):
+        if self._profiler.get_frame_count() % self._update_interval != 0:
+            return
+        median = self._profiler.get_recent_percentile(0.5) / 1e6
+        slowest = self._profiler.get_recent_percentile(0.99) / 1e6
+        fps = 1000 / median if median > 0 else 0
+        input_latency = self._profiler.percentile(self._controller.get_input_queue().get_recent_latencies(), 0.5) / 1e6
+        text = (
+            f"{fps:.0f} FPS | frame p50 {median:.1f} ms, p99 {slowest:.1f} ms | "
+            f"missed {self._profiler.get_missed_deadlines()} | items {self._controller.get_item_store().get_count()} | "
+            f"input p50 {input_latency:.1f} ms | quality {self._controller.get_quality_level()}"
+        )
+        self._controller.get_backend().set_text(self._text_item, text)
+
+    def hide(self):
+        self._controller.get_backend().delete_text(self._text_item)
+
+
+class Display:
+    """ Updates the game display """
+    def __init__(self, controller):
+        self._controller = controller
+
+    def execute(self):
+        self._controller.get_backend().update()
+        return True
+    
+
+class FramePacer:
+    """ 
+    Normalises execution speed of game across different devices and ensures game is run at a constant speed 
+    Game logic runs in fixed ticks: every frame, the time passed since the last frame decides how many ticks are due, 
+    so a slow device draws fewer frames but the game itself does not slow down 
+    """
+    def __init__(self, tick_rate, render_rate, max_catch_up_ticks):
+        self._tick_ns = 1_000_000_000 // tick_rate
+        self._frame_ns = 1_000_000_000 // render_rate
+        self._max_catch_up_ticks = max_catch_up_ticks
+
+        # Time that has passed but has not been simulated yet
+        self._accumulator = 0
+        self._prev_time = None
+        self._next_frame_time = None
+
+        # Number of ticks skipped because the game fell too far behind
+        self._skipped_ticks = 0
+
+        # Number of frames that finished after their deadline
+        self._missed_deadlines = 0
+        self._missed_last_frame = False
+
+        # Sleeping is not precise, so the last part of the wait is done by checking the time repeatedly
+        self._spin_ns = 1_000_000
+
+    # Getters
+    def get_alpha(self):
+        return self._accumulator / self._tick_ns
+
+    def get_skipped_ticks(self):
+        return self._skipped_ticks
+
+    def get_missed_deadlines(self):
+        return self._missed_deadlines
+
+    def missed_last_frame(self):
+        return self._missed_last_frame
+
+    def get_render_rate(self):
+        return 1_000_000_000 / self._frame_ns
+
+    def get_frame_budget(self):
+        # Nanoseconds between frames
+        return self._frame_ns
+
+    def get_frame_start(self):
+        # Time the current frame started, when its due ticks were counted
+        return self._prev_time
+
+    # Functions
+    def set_render_rate(self, render_rate):
+        self._frame_ns = 1_000_000_000 // render_rate
+
+    def start(self):
+        self._prev_time = time.perf_counter_ns()
+        self._next_frame_time = self._prev_time
+        self._accumulator = self._tick_ns
+
+    def get_due_ticks(self):
+        # Adds the time since the last frame and returns the number of whole ticks that fit in it
+        now = time.perf_counter_ns()
+        self._accumulator += now - self._prev_time
+        self._prev_time = now
+
+        ticks = self._accumulator // self._tick_ns
+        if ticks > self._max_catch_up_ticks:
+            # Skip the time that cannot be caught up
+            self._skipped_ticks += ticks - self._max_catch_up_ticks
+            ticks = self._max_catch_up_ticks
+            self._accumulator = ticks * self._tick_ns
+
+        self._accumulator -= ticks * self._tick_ns
+        return ticks
+
+    def wait_for_next_frame(self):
+        # Frames are scheduled from the previous deadline so that small delays do not add up
+        self._next_frame_time += self._frame_ns
+        now = time.perf_counter_ns()
+
+        self._missed_last_frame = self._next_frame_time <= now
+        if self._missed_last_frame:
+            # Frame took too long, start the schedule again from now
+            self._missed_deadlines += 1
+            self._next_frame_time = now
+            return
+
+        remaining = self._next_frame_time - now
+        if remaining > self._spin_ns:
+            time.sleep((remaining - self._spin_ns) / 1_000_000_000)
+        while time.perf_counter_ns() < self._next_frame_time:
+            pass
+
+
+class QualityGovernor:
+    """ 
+    Lowers the quality of the game while frames take longer than the frame budget, and raises it again once there is time 
+    to spare. Each level also includes the levels before it: 
+    0 full quality, 1 animations and the stats display are updated less often, 2 the background stops scrolling, 
+    3 fewer items can be alive at once 
+    The level only changes once the average frame load has stayed past a threshold for a number of frames in a row, and it 
+    takes longer to raise the quality than to lower it, so the level does not flip back and forth 
+    """
+    def __init__(self, pacer, max_level=3, lower_load=0.9, raise_load=0.6, lower_frames=30, raise_frames=240, smoothing=0.05):
+        self._pacer = pacer
+        self._max_level = max_level
+        self._level = 0
+
+        # Load is the time taken by a frame divided by the frame budget, averaged so that a single slow frame,
+        # such as one where another program took the CPU, does not change the level on its own
+        self._lower_load = lower_load
+        self._raise_load = raise_load
+        self._lower_frames = lower_frames
+        self._raise_frames = raise_frames
+        self._smoothing = smoothing
+        self._load = 0
+
+        # Frames in a row above the lowering load or below the raising load
+        self._slow_frames = 0
+        self._fast_frames = 0
+
+        # (frame, level) of every change of level
+        self._frame_count = 0
+        self._level_changes = []
+
+    # Getters
+    def get_level(self):
+        return self._level
+
+    def get_load(self):
+        # Average load of the recent frames
+        return self._load
+
+    def get_level_changes(self):
+        return self._level_changes
+
+    # Functions
+    def update(self):
+        # Run once per frame after the frame is shown, before waiting for the next frame
+        self._frame_count += 1
+        load = (time.perf_counter_ns() - self._pacer.get_frame_start()) / self._pacer.get_frame_budget()
+        self._load += (load - self._load) * self._smoothing
+        if self._load > self._lower_load:
+            self._slow_frames += 1
+            self._fast_frames = 0
+        elif self._load < self._raise_load:
+            self._fast_frames += 1
+            self._slow_frames = 0
+        else:
+            self._slow_frames = 0
+            self._fast_frames = 0
+
+        if self._slow_frames >= self._lower_frames and self._level < self._max_level:
+            self.set_level(self._level + 1)
+        elif self._fast_frames >= self._raise_frames and self._level > 0:
+            self.set_level(self._level - 1)
+
+    def set_level(self, level):
+        self._level = level
+        self._slow_frames = 0
+        self._fast_frames = 0
+        self._level_changes.append((self._frame_count, level))
+
+
+class CollisionSystem:
+    """ 
+    Finds collisions between the player and items 
+    Objects are compared by the first and last pixels of their x and y ranges instead of pixel by pixel 
+    """
+    def __init__(self):
+        pass
+
+    # Functions
+    def get_bounds(self, obj):
+        # Returns the (left, right, bottom, top) of the object, the first and last pixels of the ranges used previously
+        # The last pixel is int(x + p + 1) - 1 rather than int(x + p) since int() rounds negative numbers up
+        xcor = obj.get_xcor()
+        ycor = obj.get_ycor()
+        return (
+            int(xcor - obj.get_x_padding()),
+            int(xcor + obj.get_x_padding() + 1) - 1,
+            int(ycor - obj.get_y_padding()),
+            int(ycor + obj.get_y_padding() + 1) - 1
+        )
+
+    def overlaps(self, object1, object2):
+        # Two objects collide if both their x and y ranges overlap
+        bounds1 = self.get_bounds(object1)
+        bounds2 = self.get_bounds(object2)
+        if self.is_empty_bounds(bounds1) or self.is_empty_bounds(bounds2):
+            return False
+        left1, right1, bottom1, top1 = bounds1
+        left2, right2, bottom2, top2 = bounds2
+        return left1 <= right2 and left2 <= right1 and bottom1 <= top2 and bottom2 <= top1
+
+    def is_empty_bounds(self, bounds):
+        # An object whose edges truncate past each other covers no pixels and never collides
+        left, right, bottom, top = bounds
+        return left > right or bottom > top
+
+    def find_collisions(self, player, items):
+        # Returns the set of items that collide with the player, in one pass over the items
+        player_bounds = self.get_bounds(player)
+        if self.is_empty_bounds(player_bounds):
+            return set()
+        player_left, player_right, player_bottom, player_top = player_bounds
+
+        collided_items = set()
+        for item in items:
+            left, right, bottom, top = self.get_bounds(item)
+            if left <= player_right and player_left <= right and bottom <= player_top and player_bottom <= top:
+                # Items whose edges truncate past each other cover no pixels
+                if left <= right and bottom <= top:
+                    collided_items.add(item)
+        return collided_items
+
+
+class EndScreen(GameInitialisation):
+    """ Class containing functions related to end screen """
+    def __init__(self, final_game_stats, backend=None):
+        super().__init__(backend)
+        self._final_games_stats = final_game_stats
+
+    def execute(self):
+        # Starts turtle screen instance
+        super().execute()
+        
+        # Display end screen
+        self._screen.bgpic(self._results_image)
+
+        # Message for each stat depending on whether it ended high, low or neutral
+        stress_level = self.get_stat_level(self._final_games_stats["Stress"])
+        if stress_level == "high":
+            scale1, stress_msg = 'high,', 'perhaps \nyou should take care of yourself mentally!'
+        elif stress_level == "low":
+            scale1, stress_msg = 'low,', '\ngood job maintaining it this low!'
+        else:
+            scale1, stress_msg = 'neutral,', '\nkeep it up!'
+
+        health_level = self.get_stat_level(self._final_games_stats["Health"])
+        if health_level == "high":
             scale2, health_msg = 'high,', 'well done! \nYou have taken care of your health well!'
-        elif self._final_games_stats["Health"] < self._stat_low_threshold:
+        elif health_level == "low":
             scale2, health_msg = 'low,', 'perhaps \nyou should take care of yourself physically!'
         else:
             scale2, health_msg = 'neutral,', '\nkeep it up!'
 
-        if self._final_games_stats["Grades"] > self._stat_high_threshold:
+        grades_level = self.get_stat_level(self._final_games_stats["Grades"])
+        if grades_level == "high":
             scale3, grades_msg = 'high,', '\nand you got an A++, well done!'
-        elif self._final_games_stats["Grades"] < self._stat_low_threshold:
+        elif grades_level == "low":
             scale3, grades_msg = 'low,', 'perhaps balancing \nyour life and focusing on academics would help!'
         else:
             scale3, grades_msg = 'neutral,', '\nkeep it up!'
 
-        test_turtle = turtle.Turtle()
-        test_turtle.speed(0)
-        test_turtle.setx(self._results_xcor)
-        test_turtle.sety(-160)
-        test_turtle.write('Your stress level is relatively {} {}'.format(scale1, stress_msg), False, align='left', font=self._results_font)
-        test_turtle.sety(-30)
-        test_turtle.write('Your health level is relatively {} {}'.format(scale2, health_msg), False, align='left',font=self._results_font)
-        test_turtle.sety(80)
-        test_turtle.write('Your grades are relatively {} {}'.format(scale3, grades_msg), False, align='left',font=self._results_font)
+        # Each line is a single text item, written once
+        self._backend.create_text(self._results_xcor, -160, 'Your stress level is relatively {} {}'.format(scale1, stress_msg), 'left', self._results_font, 'black')
+        self._backend.create_text(self._results_xcor, -30, 'Your health level is relatively {} {}'.format(scale2, health_msg), 'left', self._results_font, 'black')
+        self._backend.create_text(self._results_xcor, 80, 'Your grades are relatively {} {}'.format(scale3, grades_msg), 'left', self._results_font, 'black')
+
+        self._backend.exitonclick()
+
+
+class TurtleBackend:
+    """ 
+    Draws the game in a turtle window and plays sounds through the audio engine 
+    The game is laid out in game units; the window, images, text and positions are multiplied by the scale when drawn. 
+    Images are resampled to the scale once and kept in the image cache folder, so later games only read them 
+    """
+    def __init__(self, audio_output=None, realtime=True, image_cache_folder="scaled_images"):
+        if audio_output is None:
+            audio_output = create_audio_output()
+        self._audio = AudioEngine(audio_output)
+
+        # If not realtime, the game runs as fast as the window can be drawn, used for benchmarks
+        self._realtime = realtime
+
+        # Images are resampled by zooming in by the numerator after keeping every denominator-th pixel
+        self._scale = fractions.Fraction(1)
+        self._image_cache_folder = image_cache_folder
+
+    # Getters
+    def get_audio(self):
+        return self._audio
+
+    def is_realtime(self):
+        return self._realtime
+
+    def draws_images(self):
+        return True
 
+    def get_scale(self):
+        return float(self._scale)
+
+    def get_display_size(self):
+        # Width and height of the monitor in pixels
+        canvas = turtle.getcanvas()
+        return canvas.winfo_screenwidth(), canvas.winfo_screenheight()
+
+    # Setters
+    def set_scale(self, scale):
+        # Must be set before any images are loaded. The scale is rounded down to quarters, small denominators keep
+        # resampling quick and sharp
+        self._scale = fractions.Fraction(max(math.floor(scale * 4), 1), 4)
+
+    # Drawing
+    def create_screen(self):
+        return turtle.Screen()
+
+    def load_image(self, filename):
+        # Returns the image at the scale of the window, resampled images are read from the image cache folder if they
+        # are newer than the image they were made from
+        if self._scale == 1:
+            return tkinter.PhotoImage(file=filename)
+        # Images resampled by older versions of the game are in other folders, so they are not read
+        folder = os.path.join(self._image_cache_folder, f"{float(self._scale):g}x-nearest")
+        cached_filename = os.path.join(folder, os.path.basename(filename))
+        if os.path.exists(cached_filename) and os.path.getmtime(cached_filename) >= os.path.getmtime(filename):
+            return tkinter.PhotoImage(file=cached_filename)
+
+        # Nearest neighbour resampling: every pixel is enlarged numerator times first, then every denominator-th pixel
+        # of the enlarged image is kept. Subsampling first would drop pixels of the original, such as every other row
+        # and column at 1.5 times
+        image = tkinter.PhotoImage(file=filename)
+        zoomed_image = tkinter.PhotoImage()
+        zoomed_image.tk.call(zoomed_image, "copy", image, "-zoom", self._scale.numerator, self._scale.numerator)
+        if self._scale.denominator == 1:
+            scaled_image = zoomed_image
+        else:
+            scaled_image = tkinter.PhotoImage()
+            scaled_image.tk.call(
+                scaled_image, "copy", zoomed_image, "-subsample", self._scale.denominator, self._scale.denominator
+            )
+        os.makedirs(folder, exist_ok=True)
+        scaled_image.write(cached_filename, format="gif")
+        return scaled_image
+
+    def create_turtle(self):
+        # Turtles of the game never undo, so they do not keep an undo buffer
+        obj = turtle.Turtle()
+        obj.setundobuffer(None)
+        return obj
+
+    def register_shape(self, name):
+        if self._scale == 1:
+            turtle.register_shape(name)
+        else:
+            turtle.register_shape(name, turtle.Shape("image", self.load_image(name)))
+
+    def get_image_width(self, name):
+        # Width in game units, as a float since the scale is kept as a fraction
+        return turtle.Screen()._shapes[name]._data.width() / float(self._scale)
+
+    def register_tiled_shape(self, name, tiles):
+        # Registers the image repeated tiles times side by side as a new shape, made once and kept for every game
+        tiled_name = f"{name}#tiled{tiles}"
+        shapes = turtle.Screen()._shapes
+        if tiled_name not in shapes:
+            image = shapes[name]._data
+            tiled = tkinter.PhotoImage(width=image.width() * tiles, height=image.height())
+            for index in range(tiles):
+                tiled.tk.call(tiled, "copy", image, "-to", index * image.width(), 0)
+            turtle.register_shape(tiled_name, turtle.Shape("image", tiled))
+        return tiled_name
+
+    def get_canvas(self):
+        # The Tk canvas the screen draws on, inside the scrolled canvas of a turtle window
+        canvas = turtle.getcanvas()
+        return getattr(canvas, "_canvas", canvas)
+
+    def create_sprite(self):
+        # Sprites are canvas images, moved by the game itself instead of by a turtle, so they skip turtle's undo buffer
+        # and coordinate changes. A new sprite is hidden and has no image
+        return self.get_canvas().create_image(0, 0, state="hidden")
+
+    def set_sprite_shape(self, item, name):
+        self.get_canvas().itemconfigure(item, image=turtle.Screen()._shapes[name]._data)
+
+    def set_sprite_visible(self, item, visible):
+        self.get_canvas().itemconfigure(item, state="normal" if visible else "hidden")
+
+    def move_sprites(self, moves):
+        # Moves every (item, xcor, ycor) in one Tcl script instead of one coords call each, the canvas y axis points down
+        if moves:
+            canvas = self.get_canvas()
+            path = canvas._w
+            scale = float(self._scale)
+            canvas.tk.eval("\n".join([f"{path} coords {item} {xcor * scale} {-ycor * scale}" for item, xcor, ycor in moves]))
+
+    def delete_sprite(self, item):
+        self.get_canvas().delete(item)
+
+    def register_sprite_sheet(self, filename, frame_width, frame_height, count):
+        # Cuts the sheet into frames left to right and top to bottom, each registered as a shape named "sheet#index"
+        sheet = self.load_image(filename)
+        frame_width = round(frame_width * self._scale)
+        frame_height = round(frame_height * self._scale)
+        columns = sheet.width() // frame_width
+        for index in range(count):
+            left = (index % columns) * frame_width
+            top = (index // columns) * frame_height
+            frame = tkinter.PhotoImage(width=frame_width, height=frame_height)
+            frame.tk.call(frame, "copy", sheet, "-from", left, top, left + frame_width, top + frame_height, "-to", 0, 0)
+            turtle.register_shape(f"{filename}#{index}", turtle.Shape("image", frame))
+
+    def preload_background(self, name):
+        # Decodes a full screen image into the screen's cache of background pictures, so bgpic does not decode it again
+        screen = turtle.Screen()
+        if name not in screen._bgpics:
+            screen._bgpics[name] = self.load_image(name)
+
+    def tracer(self, n, delay):
+        turtle.tracer(n, delay)
+
+    def update(self):
+        turtle.update()
+
+    def create_text(self, xcor, ycor, text, align, font, color):
+        # Writes the text with its own hidden turtle, the canvas text item is kept so its text can be changed later
+        writer = self.create_turtle()
+        writer.speed(0)
+        writer.penup()
+        writer.hideturtle()
+        writer.color(color)
+        scale = float(self._scale)
+        writer.goto(xcor * scale, ycor * scale)
+        writer.write(text, False, align=align, font=(font[0], round(font[1] * scale)) + tuple(font[2:]))
+        return writer
+
+    def set_text(self, writer, text):
+        # Changes the text of the existing canvas item instead of writing a new one
+        turtle.getcanvas().itemconfigure(writer.items[-1], text=str(text))
+
+    def set_text_visible(self, writer, visible):
+        turtle.getcanvas().itemconfigure(writer.items[-1], state="normal" if visible else "hidden")
+
+    def delete_text(self, writer):
+        writer.clear()
+
+    def exitonclick(self):
         turtle.exitonclick()
 
+    def wait_for_exit(self):
+        input("")
+
+    # Sounds
+    def needs_sound_files(self):
+        return self._audio.needs_sound_files()
+
+    def load_sound(self, filename):
+        self._audio.load(filename)
+
+    def play_music(self, filename, loop=False):
+        # Stops the current track before playing the next one
+        self._audio.play_music(filename, loop)
+
+    def play_effect(self, filename):
+        # Sound effects are mixed with the music
+        self._audio.play_effect(filename)
+
+
+class HeadlessBackend:
+    """ 
+    Backend that runs the game without a window or sound, used for simulations and testing 
+    Sprite positions are kept in plain Python state and the game loop does not wait between frames 
+    """
+    def __init__(self, audio_output=None):
+        # Sounds are only counted unless another audio output is given
+        if audio_output is None:
+            audio_output = NullAudioOutput()
+        self._audio = AudioEngine(audio_output)
+
+        # Number of display updates, useful for checking what would have been drawn
+        self._updates = 0
+
+    # Getters
+    def get_audio(self):
+        return self._audio
+
+    def get_music_played(self):
+        return self._audio.get_music_played()
+
+    def get_effects_played(self):
+        return self._audio.get_effects_played()
+
+    def get_updates(self):
+        return self._updates
+
+    def is_realtime(self):
+        return False
+
+    def draws_images(self):
+        return False
+
+    # Drawing
+    def create_screen(self):
+        return NullScreen()
+
+    def register_shape(self, name):
+        pass
+
+    def get_scale(self):
+        return 1
+
+    def get_image_width(self, name):
+        # Images are not loaded, so the size of the screen is used instead
+        return None
+
+    def register_tiled_shape(self, name, tiles):
+        return f"{name}#tiled{tiles}"
+
+    def create_sprite(self):
+        # Sprites are lists holding the shape, x and y coordinates and whether they are visible
+        return [None, 0, 0, False]
+
+    def set_sprite_shape(self, sprite, name):
+        sprite[0] = name
+
+    def set_sprite_visible(self, sprite, visible):
+        sprite[3] = visible
+
+    def move_sprites(self, moves):
+        for sprite, xcor, ycor in moves:
+            sprite[1] = xcor
+            sprite[2] = ycor
+
+    def delete_sprite(self, sprite):
+        sprite.clear()
+
+    def register_sprite_sheet(self, filename, frame_width, frame_height, count):
+        pass
+
+    def preload_background(self, name):
+        pass
+
+    def tracer(self, n, delay):
+        pass
+
+    def update(self):
+        self._updates += 1
+
+    def create_text(self, xcor, ycor, text, align, font, color):
+        # Text items are lists holding the current text and whether it is visible
+        return [str(text), True]
+
+    def set_text(self, text_item, text):
+        text_item[0] = str(text)
+
+    def set_text_visible(self, text_item, visible):
+        text_item[1] = visible
+
+    def delete_text(self, text_item):
+        text_item.clear()
+
+    def exitonclick(self):
+        pass
+
+    def wait_for_exit(self):
+        pass
+
+    # Sounds
+    def needs_sound_files(self):
+        return self._audio.needs_sound_files()
+
+    def load_sound(self, filename):
+        self._audio.load(filename)
+
+    def play_music(self, filename, loop=False):
+        self._audio.play_music(filename, loop)
+
+    def play_effect(self, filename):
+        self._audio.play_effect(filename)
+
+
+class NullScreen:
+    """ Stands in for turtle.Screen when running headless """
+    def __init__(self):
+        pass
+
+    def title(self, title):
+        pass
+
+    def setup(self, width, height):
+        pass
+
+    def bgpic(self, picname):
+        pass
+
+    def clear(self):
+        pass
+
+    def onkeypress(self, fun, key=None):
+        pass
+
+    def onkeyrelease(self, fun, key=None):
+        pass
+
+    def listen(self):
+        pass
+
+    def ontimer(self, fun, t=0):
+        pass
+
+
+class AssetManifest:
+    """ 
+    List of every file the game needs 
+    Item images are named after the rows of the item stats files, and the other sprite images are listed in other_sprites.txt, 
+    the animations file and the background layers 
+    """
+    def __init__(self, settings):
+        self._item_stats_files = [settings._normal_items_stats, settings._stress_items_stats, settings._bonus_items_stats]
+        self._timeline_file = settings._timeline_file
+        self._animations_file = settings._animations_file
+        self._data_files = [settings._other_sprites_file, self._timeline_file, self._animations_file] + self._item_stats_files
+        self._other_sprites_file = settings._other_sprites_file
+        self._background_layer_images = [layer["image"] for layer in settings._background_layers]
+        self._background_images = list(settings._background_images)
+        self._sound_files = list(settings._sound_files)
+
+    # Getters
+    def get_item_stats_files(self):
+        return self._item_stats_files
+
+    def get_timeline_file(self):
+        return self._timeline_file
+
+    def get_animations_file(self):
+        return self._animations_file
+
+    def get_sprite_sheets(self):
+        # Animations cut from a sprite sheet: (sheet, frame width, frame height, number of frames)
+        with open(self._animations_file, "r") as f:
+            animations = json.load(f)
+        return [
+            (config["sheet"], config["frame_width"], config["frame_height"], config["count"])
+            for config in animations.values() if "sheet" in config
+        ]
+
+    def get_data_files(self):
+        return self._data_files
+
+    def get_background_images(self):
+        return self._background_images
+
+    def get_sound_files(self):
+        return self._sound_files
+
+    def get_sprite_images(self):
+        # Reads the image names from the data files
+        images = []
+        for filename in self._item_stats_files:
+            with open(filename, "r") as f:
+                for row in list(csv.reader(f, delimiter=","))[1:]:
+                    images.append(f"{row[0]}.gif")
+
+        with open(self._other_sprites_file, "r") as f:
+            for each_name in f.read().splitlines():
+                if each_name:
+                    images.append(each_name + ".gif")
+
+        # Animation frames listed as images, if they are not listed already
+        with open(self._animations_file, "r") as f:
+            for config in json.load(f).values():
+                images += [image for image in config.get("frames", []) if image not in images]
+
+        # Pictures of the background layers
+        images += [image for image in self._background_layer_images if image not in images]
+        return images
+
+    def get_required_files(self, backend):
+        # Headless games only need the data files. Sounds are not required, missing sounds are not played
+        files = list(self._data_files)
+        if backend.draws_images():
+            files += self.get_sprite_images() + [sheet[0] for sheet in self.get_sprite_sheets()] + self._background_images
+        return files
+
+    def get_missing_sound_files(self, backend):
+        # Sounds that would be played but could not be found, the game runs without them
+        if not backend.needs_sound_files():
+            return []
+        return [filename for filename in self._sound_files if not os.path.exists(filename)]
+
+    def get_missing_files(self, backend):
+        missing_files = [filename for filename in self._data_files if not os.path.exists(filename)]
+        if missing_files:
+            # The other files cannot be listed without the data files
+            return missing_files
+        return [filename for filename in self.get_required_files(backend) if not os.path.exists(filename)]
+
+
+class AssetLoader:
+    """ 
+    Loads every asset once per process: item data is read once, and images and sounds are decoded once for each backend 
+    The time taken to load each asset is kept so that slow assets can be found 
+    """
+    def __init__(self):
+        self._item_tables = {}
+        self._configs = {}
+        # Backends are only weakly referenced, so finished games do not keep their backend and audio engine alive
+        self._loaded_backends = weakref.WeakSet()
+
+        # (filename, seconds) for every asset loaded
+        self._load_times = []
+        self._print_report = False
+
+    # Getters
+    def get_load_times(self):
+        return self._load_times
+
+    def get_item_table(self, filename):
+        # Returns a copy of the {name: item type} table of an item stats file, the item types are shared by every game
+        # The weight and max-concurrent columns are optional: items have a weight of 1, and a max-concurrent of 0 for no limit
+        if filename not in self._item_tables:
+            start_time = time.perf_counter()
+            item_table = {}
+            with open(filename, "r") as f:
+                rows = list(csv.reader(f, delimiter=","))
+            for row in rows[1:]:
+                columns = dict(zip(rows[0], row))
+                item_table[row[0]] = ItemType(
+                    row[0], *[int(columns[column]) for column in ItemType.required_columns],
+                    float(columns.get("weight") or 1), int(columns.get("max-concurrent") or 0)
+                )
+            self._item_tables[filename] = item_table
+            self._load_times.append((filename, time.perf_counter() - start_time))
+        return dict(self._item_tables[filename])
+
+    def get_config(self, filename):
+        # Returns the contents of a JSON file such as the timeline, shared by every game so it must not be changed
+        if filename not in self._configs:
+            start_time = time.perf_counter()
+            with open(filename, "r") as f:
+                self._configs[filename] = json.load(f)
+            self._load_times.append((filename, time.perf_counter() - start_time))
+        return self._configs[filename]
+
+    # Functions
+    def enable_report(self):
+        self._print_report = True
+
+    def timed(self, filename, function):
+        start_time = time.perf_counter()
+        function(filename)
+        self._load_times.append((filename, time.perf_counter() - start_time))
+
+    def load(self, settings):
+        # Checks every file is present, then loads all assets the backend has not loaded yet
+        backend = settings.get_backend()
+        if backend in self._loaded_backends:
+            return
+
+        manifest = AssetManifest(settings)
+        missing_files = manifest.get_missing_files(backend)
+        if missing_files:
+            raise FileNotFoundError(f"Missing files needed by the game: {', '.join(missing_files)}")
+
+        for filename in manifest.get_item_stats_files():
+            self.get_item_table(filename)
+        self.get_config(manifest.get_timeline_file())
+        self.get_config(manifest.get_animations_file())
+        if backend.draws_images():
+            for filename in manifest.get_sprite_images():
+                self.timed(filename, backend.register_shape)
+            for sheet, frame_width, frame_height, count in manifest.get_sprite_sheets():
+                self.timed(sheet, lambda filename: backend.register_sprite_sheet(filename, frame_width, frame_height, count))
+            for filename in manifest.get_background_images():
+                self.timed(filename, backend.preload_background)
+        if backend.needs_sound_files():
+            for filename in manifest.get_sound_files():
+                self.timed(filename, backend.load_sound)
+        self._loaded_backends.add(backend)
+
+        if self._print_report:
+            self.print_report()
+
+    def print_report(self):
+        # Prints the load time of each asset, slowest first
+        total_time = sum(seconds for filename, seconds in self._load_times)
+        print(f"Loaded {len(self._load_times)} assets in {total_time * 1000:.1f} ms")
+        for filename, seconds in sorted(self._load_times, key=lambda entry: entry[1], reverse=True):
+            print(f"  {filename:<32}{seconds * 1000:8.2f} ms")
+
+
+# Assets are shared by every screen in the game
+asset_loader = AssetLoader()
+
+
+class ReplayRecorder:
+    """ 
+    Records a game so it can be replayed exactly: the random seed, the character, and the keys held down on every tick 
+    File format (little-endian): header, final stats and spawn checksum, then the zlib-compressed key masks, two ticks per byte 
+    """
+    header_format = "<8sHQBI"
+    results_format = "<3hI"
+    magic = b"SUTDRPLY"
+    # Version 2: items are picked from weighted spawn tables
+    version = 2
+    characters = ["Male", "Female"]
+
+    def __init__(self, filename):
+        self._filename = filename
+        self._key_masks = bytearray()
+
+    # Functions
+    def record_tick(self, key_mask):
+        self._key_masks.append(key_mask)
+
+    def save(self, controller):
+        # Key masks only use 4 bits, so two ticks are stored in each byte
+        key_masks = self._key_masks + bytearray(len(self._key_masks) % 2)
+        packed = bytes(key_masks[i] | (key_masks[i + 1] << 4) for i in range(0, len(key_masks), 2))
+
+        game_stats = controller.get_game_stats()
+        with open(self._filename, "wb") as f:
+            f.write(struct.pack(
+                ReplayRecorder.header_format, ReplayRecorder.magic, ReplayRecorder.version,
+                controller.get_seed(), ReplayRecorder.characters.index(controller.get_character()), len(self._key_masks)
+            ))
+            f.write(struct.pack(
+                ReplayRecorder.results_format,
+                game_stats["Stress"], game_stats["Health"], game_stats["Grades"], controller.get_timeline_checksum()
+            ))
+            f.write(zlib.compress(packed, 9))
+
+
+class ReplayPlayer:
+    """ Reads a file saved by ReplayRecorder and gives back the recorded keys one tick at a time """
+    def __init__(self, filename):
+        with open(filename, "rb") as f:
+            data = f.read()
+
+        header_size = struct.calcsize(ReplayRecorder.header_format)
+        results_size = struct.calcsize(ReplayRecorder.results_format)
+        magic, version, self._seed, character, self._tick_count = struct.unpack_from(ReplayRecorder.header_format, data)
+        if magic != ReplayRecorder.magic or version != ReplayRecorder.version:
+            raise ValueError(f"{filename} is not a replay file for this version of the game")
+        self._character = ReplayRecorder.characters[character]
+
+        stress, health, grades, self._timeline_checksum = struct.unpack_from(ReplayRecorder.results_format, data, header_size)
+        self._final_stats = {"Stress": stress, "Health": health, "Grades": grades}
+
+        packed = zlib.decompress(data[header_size + results_size:])
+        self._key_masks = bytearray()
+        for byte in packed:
+            self._key_masks.append(byte & 15)
+            self._key_masks.append(byte >> 4)
+        del self._key_masks[self._tick_count:]
+
+        self._next_tick = 0
+
+    # Getters
+    def get_seed(self):
+        return self._seed
+
+    def get_character(self):
+        return self._character
+
+    def get_tick_count(self):
+        return self._tick_count
+
+    def get_final_stats(self):
+        return self._final_stats
+
+    def get_timeline_checksum(self):
+        return self._timeline_checksum
+
+    # Functions
+    def get_next_key_mask(self):
+        # No keys are held down after the end of the recording
+        if self._next_tick >= self._tick_count:
+            return 0
+        key_mask = self._key_masks[self._next_tick]
+        self._next_tick += 1
+        return key_mask
+
+
+class GameSnapshot:
+    """ 
+    State of a game between two ticks, saved by GameController.save_snapshot so the game can carry on from it: the stats, 
+    the position in the timeline, the random number generator, the player, the background layers and every live item 
+    File format (zlib-compressed, little-endian): header, random generator state, player and layer positions, items, then 
+    the stage, event and item names separated by new lines 
+    """
+    # magic, version, seed, character, tick, next action, ending, spawn checksum, stats, keys, item, layer and name counts
+    header_format = "<8sHQBIH?I3hBHBH"
+    random_format = "<625I?d"
+    # previous x, previous y, x, y
+    position_format = "<4d"
+    # name index, speed, previous x, previous y, x, y
+    item_format = "<Hd4d"
+    magic = b"SUTDSNAP"
+    version = 1
+
+    def __init__(self, data):
+        data = zlib.decompress(data)
+        (
+            magic, version, self._seed, character, self._frames, self._next_action, self._game_ending, self._timeline_checksum,
+            stress, health, grades, self._key_mask, item_count, layer_count, name_count
+        ) = struct.unpack_from(GameSnapshot.header_format, data)
+        if magic != GameSnapshot.magic or version != GameSnapshot.version:
+            raise ValueError("This is not a snapshot of this version of the game")
+        self._character = ReplayRecorder.characters[character]
+        self._game_stats = {"Stress": stress, "Health": health, "Grades": grades}
+        offset = struct.calcsize(GameSnapshot.header_format)
+
+        random_state = struct.unpack_from(GameSnapshot.random_format, data, offset)
+        self._random_state = (3, random_state[:625], random_state[626] if random_state[625] else None)
+        offset += struct.calcsize(GameSnapshot.random_format)
+
+        position_size = struct.calcsize(GameSnapshot.position_format)
+        positions = [struct.unpack_from(GameSnapshot.position_format, data, offset + index * position_size) for index in range(layer_count + 1)]
+        self._player_positions = positions[0]
+        self._layer_positions = positions[1:]
+        offset += (layer_count + 1) * position_size
+
+        items = list(struct.iter_unpack(GameSnapshot.item_format, data[offset:offset + item_count * struct.calcsize(GameSnapshot.item_format)]))
+        offset += item_count * struct.calcsize(GameSnapshot.item_format)
+
+        names = data[offset:].decode().split("\n")
+        if len(names) != name_count:
+            raise ValueError("The snapshot is damaged")
+        self._stage = (names[0], names[1], self._game_ending)
+        self._items = [(names[item[0]], item[1], item[2:]) for item in items]
+
+    # Getters
+    def get_seed(self):
+        return self._seed
+
+    def get_character(self):
+        return self._character
+
+    def get_frames(self):
+        return self._frames
+
+    def get_next_action(self):
+        return self._next_action
+
+    def get_stage(self):
+        # (stage, event, whether the game is ending), an empty string for no event
+        return self._stage
+
+    def get_timeline_checksum(self):
+        return self._timeline_checksum
+
+    def get_game_stats(self):
+        return self._game_stats
+
+    def get_random_state(self):
+        return self._random_state
+
+    def get_key_mask(self):
+        return self._key_mask
+
+    def get_player_positions(self):
+        return self._player_positions
+
+    def get_layer_positions(self):
+        return self._layer_positions
+
+    def get_items(self):
+        # (name, speed, positions) of every live item, in the order they were spawned
+        return self._items
+
+
+class AudioEngine:
+    """ 
+    Plays music and sound effects. Sounds are decoded once into samples in the same format, and a single worker thread 
+    mixes the voices that are playing and writes the result to the audio output 
+    Only a limited number of sound effects play at the same time; when a new one starts, the oldest one is stopped 
+    """
+    def __init__(self, output, max_effect_voices=4, max_commands=32):
+        self._output = output
+
+        # Format all sounds are converted to
+        self._sample_rate = 48000
+        self._channels = 2
+        self._block_frames = 1024
+
+        # Decoded sounds by filename
+        self._samples = {}
+
+        # Commands are sent to the worker thread through a bounded queue, commands are dropped if it is full
+        self._commands = queue.Queue(max_commands)
+        self._worker = None
+
+        # Voices playing, each is [sample, position, loop]. Only the worker thread uses these
+        self._max_effect_voices = max_effect_voices
+        self._effect_voices = []
+        self._music_voice = None
+
+        # Statistics
+        self._music_played = []
+        self._effects_played = 0
+        self._dropped_commands = 0
+        self._stolen_voices = 0
+
+    # Getters
+    def get_music_played(self):
+        return self._music_played
+
+    def get_effects_played(self):
+        return self._effects_played
+
+    def get_dropped_commands(self):
+        return self._dropped_commands
+
+    def get_stolen_voices(self):
+        return self._stolen_voices
+
+    def is_loaded(self, filename):
+        return filename in self._samples
+
+    def needs_sound_files(self):
+        return self._output.needs_mixing()
+
+    # Loading
+    def load(self, filename):
+        # Decodes a WAV file into 16-bit samples at the engine's sample rate and number of channels
+        if filename in self._samples or not self._output.needs_mixing():
+            return
+        if not os.path.exists(filename):
+            # Missing sounds are listed when the game starts and are not played
+            self._samples[filename] = None
+            return
+
+        with wave.open(filename, "rb") as wav_file:
+            channels = wav_file.getnchannels()
+            sample_width = wav_file.getsampwidth()
+            sample_rate = wav_file.getframerate()
+            data = wav_file.readframes(wav_file.getnframes())
+
+        if sample_width == 1:
+            # 8-bit WAV files are unsigned
+            samples = array.array("h", [(value - 128) << 8 for value in data])
+        elif sample_width == 2:
+            samples = array.array("h", data)
+        else:
+            print(f"Sound file {filename} is not 8 or 16-bit, it will not be played")
+            self._samples[filename] = None
+            return
+
+        self._samples[filename] = self.convert(samples, channels, sample_rate)
+
+    def load_all(self, filenames):
+        for filename in filenames:
+            self.load(filename)
+
+    def convert(self, samples, channels, sample_rate):
+        # Converts interleaved samples to the engine's format, resampling by picking the nearest frame
+        frame_count = len(samples) // channels
+        new_frame_count = frame_count * self._sample_rate // sample_rate
+
+        if np is not None:
+            frames = np.frombuffer(samples.tobytes(), dtype=np.int16).reshape(frame_count, channels)
+            frames = frames[np.arange(new_frame_count) * sample_rate // self._sample_rate]
+            if channels == 1:
+                frames = np.repeat(frames, self._channels, axis=1)
+            return np.ascontiguousarray(frames[:, :self._channels]).reshape(-1).astype(np.int32)
+
+        converted = array.array("h")
+        for frame in range(new_frame_count):
+            source = (frame * sample_rate // self._sample_rate) * channels
+            for channel in range(self._channels):
+                converted.append(samples[source + min(channel, channels - 1)])
+        return converted
+
+    # Playing
+    def send(self, command):
+        if not self._output.needs_mixing():
+            return
+        if self._worker is None:
+            self._worker = threading.Thread(target=self.run, daemon=True)
+            self._worker.start()
+        try:
+            self._commands.put_nowait(command)
+        except queue.Full:
+            self._dropped_commands += 1
+
+    def play_effect(self, filename):
+        self._effects_played += 1
+        self.send(("effect", filename))
+
+    def play_music(self, filename, loop=False):
+        # Replaces the music currently playing
+        self._music_played.append(filename)
+        self.send(("music", filename, loop))
+
+    def stop_music(self):
+        self.send(("stop_music",))
+
+    def close(self):
+        if self._worker is not None:
+            self._commands.put(("quit",))
+            self._worker.join(1)
+            self._worker = None
+
+    # Worker thread
+    def handle_command(self, command):
+        # Returns False once the engine should stop
+        match command[0]:
+            case "effect":
+                sample = self._samples.get(command[1])
+                if sample is not None:
+                    if len(self._effect_voices) >= self._max_effect_voices:
+                        self._effect_voices.pop(0)
+                        self._stolen_voices += 1
+                    self._effect_voices.append([sample, 0, False])
+            case "music":
+                sample = self._samples.get(command[1])
+                self._music_voice = [sample, 0, command[2]] if sample is not None else None
+            case "stop_music":
+                self._music_voice = None
+            case "quit":
+                return False
+        return True
+
+    def mix_voice(self, voice, mixed, length):
+        # Adds the next part of the voice to the mixed samples, returns False once the voice has finished
+        sample, position, loop = voice
+        written = 0
+        while written < length:
+            chunk = sample[position:position + length - written]
+            if np is not None:
+                mixed[written:written + len(chunk)] += chunk
+            else:
+                for index, value in enumerate(chunk):
+                    mixed[written + index] += value
+            written += len(chunk)
+            position += len(chunk)
+            if position >= len(sample):
+                if not loop:
+                    return False
+                position = 0
+        voice[1] = position
+        return True
+
+    def mix_block(self):
+        # Mixes one block of all voices into 16-bit samples
+        length = self._block_frames * self._channels
+        mixed = np.zeros(length, dtype=np.int32) if np is not None else array.array("i", bytes(4 * length))
+
+        if self._music_voice is not None and not self.mix_voice(self._music_voice, mixed, length):
+            self._music_voice = None
+        self._effect_voices = [voice for voice in self._effect_voices if self.mix_voice(voice, mixed, length)]
+
+        if np is not None:
+            return np.clip(mixed, -32768, 32767).astype(np.int16).tobytes()
+        return array.array("h", [max(-32768, min(32767, value)) for value in mixed]).tobytes()
+
+    def run(self):
+        self._output.open(self._sample_rate, self._channels, 2)
+        running = True
+        while running:
+            # Wait for a command when nothing is playing, otherwise only handle the commands already sent
+            try:
+                playing = self._music_voice is not None or self._effect_voices
+                command = self._commands.get(block=not playing)
+                running = self.handle_command(command)
+                while running:
+                    running = self.handle_command(self._commands.get_nowait())
+            except queue.Empty:
+                pass
+
+            if running and (self._music_voice is not None or self._effect_voices):
+                self._output.write(self.mix_block())
+        self._output.close()
+
+
+class NullAudioOutput:
+    """ Audio output that plays nothing, sounds are not decoded or mixed """
+    def needs_mixing(self):
+        return False
+
+    def open(self, sample_rate, channels, sample_width):
+        pass
+
+    def write(self, data):
+        pass
+
+    def close(self):
+        pass
+
+
+class WaveFileAudioOutput:
+    """ Audio output that records the mixed sound to a WAV file in real time, for devices without sound hardware """
+    def __init__(self, filename):
+        self._filename = filename
+        self._file = None
+        self._frame_bytes = None
+        self._sample_rate = None
+        self._next_write_time = None
+
+    def needs_mixing(self):
+        return True
+
+    def open(self, sample_rate, channels, sample_width):
+        self._file = wave.open(self._filename, "wb")
+        self._file.setnchannels(channels)
+        self._file.setsampwidth(sample_width)
+        self._file.setframerate(sample_rate)
+        self._frame_bytes = channels * sample_width
+        self._sample_rate = sample_rate
+        self._next_write_time = time.perf_counter()
+
+    def write(self, data):
+        # Waits as long as a sound card would take to play the data
+        delay = self._next_write_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._file.writeframes(data)
+        self._next_write_time = max(self._next_write_time, time.perf_counter()) + len(data) / self._frame_bytes / self._sample_rate
+
+    def close(self):
+        self._file.close()
+
+
+class SoundDeviceAudioOutput:
+    """ Audio output that plays through the sounddevice package, when it is installed """
+    def __init__(self):
+        self._stream = None
+
+    def needs_mixing(self):
+        return True
+
+    def open(self, sample_rate, channels, sample_width):
+        import sounddevice
+        self._stream = sounddevice.RawOutputStream(samplerate=sample_rate, channels=channels, dtype="int16")
+        self._stream.start()
+
+    def write(self, data):
+        self._stream.write(data)
+
+    def close(self):
+        self._stream.stop()
+        self._stream.close()
+
+
+class WaveFormatEx(ctypes.Structure):
+    """ WAVEFORMATEX structure used by the Windows waveOut functions """
+    _pack_ = 1
+    _fields_ = [
+        ("wFormatTag", ctypes.c_uint16),
+        ("nChannels", ctypes.c_uint16),
+        ("nSamplesPerSec", ctypes.c_uint32),
+        ("nAvgBytesPerSec", ctypes.c_uint32),
+        ("nBlockAlign", ctypes.c_uint16),
+        ("wBitsPerSample", ctypes.c_uint16),
+        ("cbSize", ctypes.c_uint16)
+    ]
+
+
+class WaveHeader(ctypes.Structure):
+    """ WAVEHDR structure used by the Windows waveOut functions """
+    _fields_ = [
+        ("lpData", ctypes.c_void_p),
+        ("dwBufferLength", ctypes.c_uint32),
+        ("dwBytesRecorded", ctypes.c_uint32),
+        ("dwUser", ctypes.c_size_t),
+        ("dwFlags", ctypes.c_uint32),
+        ("dwLoops", ctypes.c_uint32),
+        ("lpNext", ctypes.c_void_p),
+        ("reserved", ctypes.c_size_t)
+    ]
+
+
+class WinmmAudioOutput:
+    """ 
+    Audio output that plays through the waveOut functions of winmm, available on every Windows device 
+    A few blocks are queued on the sound card at a time; writing waits until the oldest one has finished playing 
+    """
+    def __init__(self, max_queued_blocks=3):
+        self._max_queued_blocks = max_queued_blocks
+        self._winmm = None
+        self._handle = ctypes.c_void_p()
+
+        # (header, buffer) pairs queued on the sound card
+        self._queued = []
+
+    def needs_mixing(self):
+        return True
+
+    def open(self, sample_rate, channels, sample_width):
+        self._winmm = ctypes.WinDLL("winmm")
+        header_pointer = ctypes.POINTER(WaveHeader)
+        self._winmm.waveOutOpen.argtypes = [ctypes.POINTER(ctypes.c_void_p), ctypes.c_uint, ctypes.POINTER(WaveFormatEx), ctypes.c_size_t, ctypes.c_size_t, ctypes.c_uint32]
+        self._winmm.waveOutPrepareHeader.argtypes = [ctypes.c_void_p, header_pointer, ctypes.c_uint]
+        self._winmm.waveOutUnprepareHeader.argtypes = [ctypes.c_void_p, header_pointer, ctypes.c_uint]
+        self._winmm.waveOutWrite.argtypes = [ctypes.c_void_p, header_pointer, ctypes.c_uint]
+        self._winmm.waveOutReset.argtypes = [ctypes.c_void_p]
+        self._winmm.waveOutClose.argtypes = [ctypes.c_void_p]
+
+        block_align = channels * sample_width
+        wave_format = WaveFormatEx(1, channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8, 0)
+
+        # 0xFFFFFFFF is WAVE_MAPPER, the default output device
+        result = self._winmm.waveOutOpen(ctypes.byref(self._handle), 0xFFFFFFFF, ctypes.byref(wave_format), 0, 0, 0)
+        if result != 0:
+            raise OSError(f"waveOutOpen failed with error {result}")
+
+    def release_oldest(self):
+        # Waits for the oldest queued block to finish playing, 1 is WHDR_DONE
+        header, buffer = self._queued.pop(0)
+        while not header.dwFlags & 1:
+            time.sleep(0.002)
+        self._winmm.waveOutUnprepareHeader(self._handle, ctypes.byref(header), ctypes.sizeof(header))
+
+    def write(self, data):
+        buffer = ctypes.create_string_buffer(data, len(data))
+        header = WaveHeader(ctypes.addressof(buffer), len(data), 0, 0, 0, 0, None, 0)
+        self._winmm.waveOutPrepareHeader(self._handle, ctypes.byref(header), ctypes.sizeof(header))
+        self._winmm.waveOutWrite(self._handle, ctypes.byref(header), ctypes.sizeof(header))
+        self._queued.append((header, buffer))
+
+        while len(self._queued) > self._max_queued_blocks:
+            self.release_oldest()
+
+    def close(self):
+        # Resetting marks every queued block as done
+        self._winmm.waveOutReset(self._handle)
+        while self._queued:
+            self.release_oldest()
+        self._winmm.waveOutClose(self._handle)
+
+
+def create_audio_output():
+    # Uses sounddevice if it is installed, otherwise the Windows sound functions, otherwise plays nothing
+    try:
+        import sounddevice
+        return SoundDeviceAudioOutput()
+    except (ImportError, OSError):
+        pass
+    if os.name == "nt":
+        return WinmmAudioOutput()
+    return NullAudioOutput()
+
+
+def run_replay(filename, backend):
+    # Replays a recorded game as fast as possible and returns whether it ended the same way
+    replay = ReplayPlayer(filename)
+    start_time = time.perf_counter()
+    game = GameController(replay.get_character(), backend, replay.get_seed())
+    game.set_replay(replay)
+    final_stats = game.execute()
+    elapsed = time.perf_counter() - start_time
+
+    print(f"Replayed {replay.get_tick_count()} ticks in {elapsed:.2f} seconds")
+    print(f"Final stats: {final_stats} (recorded {replay.get_final_stats()})")
+    matches = final_stats == replay.get_final_stats() and game.get_timeline_checksum() == replay.get_timeline_checksum()
+    if matches:
+        print("Replay matches the recording")
+    else:
+        print("Replay does not match the recording")
+    return matches
+
+
+def run_snapshot(filename, backend, profile_filename=None, show_overlay=False, checkpoint_folder=None):
+    # Starts the game from a snapshot, without the title screen
+    with open(filename, "rb") as f:
+        snapshot = GameSnapshot(f.read())
+    game = GameController(snapshot.get_character(), backend, snapshot.get_seed())
+    game.set_snapshot(snapshot)
+    if profile_filename is not None or show_overlay:
+        game.enable_profiler(profile_filename, show_overlay)
+    if checkpoint_folder is not None:
+        game.enable_checkpoints(checkpoint_folder)
+    print(f"Starting from tick {snapshot.get_frames()} of the game with seed {snapshot.get_seed()}")
+    final_stats = game.execute()
+    print(f"Final stats: {final_stats}")
+
+
+def run_headless(character_option, backend, seed=None, record_filename=None, profile_filename=None, checkpoint_folder=None):
+    # Runs a full game without a window and prints the final stats
+    start_time = time.perf_counter()
+    game = GameController(character_option, backend, seed)
+    if record_filename is not None:
+        game.set_recorder(ReplayRecorder(record_filename))
+    if profile_filename is not None:
+        game.enable_profiler(profile_filename)
+    if checkpoint_folder is not None:
+        game.enable_checkpoints(checkpoint_folder)
+    final_stats = game.execute()
+    elapsed = time.perf_counter() - start_time
+    sprite_pool = game.get_sprite_pool()
+    print(f"Final stats: {final_stats}")
+    print(f"Sprite pool: {sprite_pool.get_hits()} hits, {sprite_pool.get_misses()} misses")
+    print(f"Simulated game finished in {elapsed:.2f} seconds")
+
+
 def main():
-    title = TitleScreen()
+    parser = argparse.ArgumentParser(description="SUTD Side-Scrolling Game")
+    parser.add_argument("--headless", action="store_true", help="run one game without a window or sound and print the results")
+    parser.add_argument("--character", choices=["Male", "Female"], default="Male", help="character used when running headless")
+    parser.add_argument("--audio-file", help="record the game's sound to this WAV file instead of playing it")
+    parser.add_argument("--asset-report", action="store_true", help="print how long each image, sound and data file took to load")
+    parser.add_argument("--seed", type=int, help="random seed used when running headless")
+    parser.add_argument("--record", help="record the game to this file so it can be replayed")
+    parser.add_argument("--replay", help="replay a recorded game without a window, as fast as possible")
+    parser.add_argument("--profile", help="save the time taken by each part of every frame to PROFILE.csv and PROFILE.json")
+    parser.add_argument("--overlay", action="store_true", help="show the frame rate and frame times on screen")
+    parser.add_argument("--checkpoints", metavar="FOLDER", help="save a snapshot of the game to this folder every second of the game")
+    parser.add_argument("--snapshot", help="start the game from a snapshot saved with --checkpoints")
+    parser.add_argument("--resolution", metavar="WIDTHxHEIGHT", help="scale the window to fit this resolution, or auto to fit the monitor")
+    args = parser.parse_args()
+    if args.snapshot is not None and (args.record is not None or args.replay is not None):
+        parser.error("a game started from a snapshot cannot be recorded or replayed")
+
+    audio_output = WaveFileAudioOutput(args.audio_file) if args.audio_file else None
+    headless = args.headless or args.replay is not None
+    backend = HeadlessBackend(audio_output) if headless else TurtleBackend(audio_output)
+
+    # The game is scaled to the largest size that fits the resolution, before any images are loaded
+    settings = GameInitialisation(backend)
+    if args.resolution is not None and not headless:
+        if args.resolution == "auto":
+            width, height = backend.get_display_size()
+        else:
+            width, height = [int(size) for size in args.resolution.lower().split("x")]
+        backend.set_scale(min(width / settings.get_screen_width(), height / settings.get_screen_height()))
+
+    # Check every file is present before starting, the game runs without the sounds that are missing
+    manifest = AssetManifest(settings)
+    missing_files = manifest.get_missing_files(backend)
+    if missing_files:
+        print("The following files are needed to run the game but could not be found:")
+        for filename in missing_files:
+            print(f"  {filename}")
+        return
+    missing_sound_files = manifest.get_missing_sound_files(backend)
+    if missing_sound_files:
+        print("The following sounds could not be found and will not be played:")
+        for filename in missing_sound_files:
+            print(f"  {filename}")
+
+    if args.asset_report:
+        asset_loader.enable_report()
+
+    if args.replay is not None:
+        run_replay(args.replay, backend)
+        return
+
+    if args.snapshot is not None:
+        run_snapshot(args.snapshot, backend, args.profile, args.overlay and not headless, args.checkpoints)
+        return
+
+    if args.headless:
+        run_headless(args.character, backend, args.seed, args.record, args.profile, args.checkpoints)
+        return
+
+    title = TitleScreen(backend, args.record, args.profile, args.overlay, args.checkpoints)
     title.execute()
     
     
@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import game
+
+
+STATS = ["Stress", "Health", "Grades"]
+LEVELS = ["low", "neutral", "high"]
+
+# Key masks of the player, the same bits as the key snapshots of the game
+UP, DOWN, LEFT, RIGHT = game.InputQueue.UP, game.InputQueue.DOWN, game.InputQueue.LEFT, game.InputQueue.RIGHT
+
+
+class IdlePolicy:
+    """ Simulated player that never moves """
+    def __init__(self, seed):
+        pass
+
+    def get_key_mask(self, controller):
+        return 0
+
+
+class SweepPolicy:
+    """ Scripted player that moves up and down across the whole screen, holding each key for a fixed number of ticks """
+    def __init__(self, seed, half_sweep_ticks=90):
+        self._half_sweep_ticks = half_sweep_ticks
+        self._tick = 0
+
+    def get_key_mask(self, controller):
+        # Up from the middle, down to the bottom, then back up to the middle
+        phase = (self._tick // self._half_sweep_ticks) % 4
+        self._tick += 1
+        return UP if phase in (0, 3) else DOWN
+
+
+class RandomWalkPolicy:
+    """ Simulated player that holds a random direction, and changes to a new random direction now and then """
+    def __init__(self, seed, change_chance=0.05):
+        # A separate random stream, so the policy does not change which items the game spawns
+        self._random = random.Random(f"policy-{seed}")
+        self._change_chance = change_chance
+        self._key_mask = 0
+
+    def get_key_mask(self, controller):
+        if self._random.random() < self._change_chance:
+            vertical = self._random.choice([0, UP, DOWN])
+            horizontal = self._random.choice([0, LEFT, RIGHT])
+            self._key_mask = vertical | horizontal
+        return self._key_mask
+
+
+POLICIES = {"idle": IdlePolicy, "sweep": SweepPolicy, "random": RandomWalkPolicy}
+
+
+def make_jobs(config_name, policy, character, games, base_seed, folder=None, settings=None, item_stats=None, timeline=None):
+    # One job per game, each with its own seed
+    # A config can use item stats files from a folder, and change settings, item stats columns and the timeline
+    return [{
+        "config": config_name,
+        "policy": policy,
+        "character": character,
+        "seed": base_seed + index,
+        "folder": folder,
+        "settings": settings or {},
+        "item_stats": item_stats or {},
+        "timeline": timeline or {}
+    } for index in range(games)]
+
+
+def run_session(job):
+    # Plays one headless game and returns its final stats and whether each stat ended high, low or neutral
+    controller = game.GameController(job["character"], game.HeadlessBackend(), job["seed"])
+    if job["folder"] is not None:
+        controller.use_item_stats_folder(job["folder"])
+    controller.change_settings(job["settings"])
+    controller.change_item_stats(job["item_stats"])
+    controller.change_timeline(job["timeline"])
+    controller.set_policy(POLICIES[job["policy"]](job["seed"]))
+    final_stats = dict(controller.play())
+    levels = {stat: controller.get_stat_level(final_stats[stat]) for stat in STATS}
+    return job["config"], final_stats, levels
+
+
+def iter_jobs(jobs, workers):
+    # Yields the result of each job in order, as soon as it is ready
+    # Games are independent, so they are shared between processes in chunks to keep the time spent sending jobs low
+    if workers == 1:
+        for job in jobs:
+            yield run_session(job)
+        return
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(run_session, jobs, chunksize=chunksize)
+
+
+def run_jobs(jobs, workers):
+    return list(iter_jobs(jobs, workers))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarise(results):
+    # Distribution of each final stat and of its level, for each config
+    summary = {}
+    for config_name in dict.fromkeys(result[0] for result in results):
+        config_results = [result for result in results if result[0] == config_name]
+        config_summary = {"games": len(config_results), "stats": {}, "levels": {}}
+        for stat in STATS:
+            values = [final_stats[stat] for name, final_stats, levels in config_results]
+
+            # Games in each band of 10, the last band includes 100
+            histogram = [0] * 10
+            for value in values:
+                histogram[min(value // 10, 9)] += 1
+
+            config_summary["stats"][stat] = {
+                "mean": statistics.mean(values),
+                "stdev": statistics.pstdev(values),
+                "min": min(values),
+                "p10": percentile(values, 0.1),
+                "p50": percentile(values, 0.5),
+                "p90": percentile(values, 0.9),
+                "max": max(values),
+                "histogram": histogram
+            }
+            config_summary["levels"][stat] = {
+                level: sum(1 for name, final_stats, levels in config_results if levels[stat] == level) / len(config_results)
+                for level in LEVELS
+            }
+        summary[config_name] = config_summary
+    return summary
+
+
+def print_summary(summary):
+    for config_name, config_summary in summary.items():
+        print(f"{config_name} ({config_summary['games']} games)")
+        for stat in STATS:
+            stat_summary = config_summary["stats"][stat]
+            levels = config_summary["levels"][stat]
+            print(
+                f"  {stat:<8}mean {stat_summary['mean']:6.1f} +- {stat_summary['stdev']:5.1f}  "
+                f"p10/p50/p90 {stat_summary['p10']:3}/{stat_summary['p50']:3}/{stat_summary['p90']:3}  "
+                + "  ".join(f"{level} {levels[level]:6.1%}" for level in LEVELS)
+            )
+
+
+def parse_settings(assignments):
+    # NAME=VALUE pairs, values are read as JSON when possible so numbers and lists keep their type
+    settings = {}
+    for assignment in assignments:
+        name, value = assignment.split("=", 1)
+        try:
+            settings[name] = json.loads(value)
+        except json.JSONDecodeError:
+            settings[name] = value
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays many headless games with simulated players to see how item stats change the results")
+    parser.add_argument("--games", type=int, default=100, help="games played for each config")
+    parser.add_argument("--config", action="append", default=[], metavar="NAME=FOLDER",
+                        help="item stats files to use, any of the three files missing from FOLDER are taken from the game (default: the game's own files)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="change a game setting, such as _player_speed=5")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random", help="how the simulated player moves")
+    parser.add_argument("--character", choices=["Male", "Female"], default="Male")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, the other games use the following seeds")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of processes playing games")
+    parser.add_argument("--output", default="simulation_results.json", help="file the summary is saved to")
+    args = parser.parse_args()
+
+    configs = [config.split("=", 1) for config in args.config] or [["base", None]]
+    settings = parse_settings(args.set)
+
+    # Every config plays the same seeds, so differences come from the config and not from luck
+    jobs = []
+    for config_name, folder in configs:
+        jobs += make_jobs(config_name, args.policy, args.character, args.games, args.seed, folder, settings)
+
+    start_time = time.perf_counter()
+    results = run_jobs(jobs, args.workers)
+    elapsed = time.perf_counter() - start_time
+    print(f"Played {len(jobs)} games in {elapsed:.1f} seconds with {args.workers} processes")
+
+    summary = summarise(results)
+    print_summary(summary)
+    with open(args.output, "w") as f:
+        json.dump({"policy": args.policy, "settings": settings, "configs": summary}, f, indent=2)
+    print(f"Summary saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import argparse
+import decimal
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import game
+import simulate
+
+
+def parse_values(values):
+    # A comma separated list, or START:STOP:STEP for every number from START to STOP inclusive
+    # Values repeated in the list are only kept once
+    if ":" in values:
+        parts = values.split(":")
+        start, stop, step = [json.loads(part) for part in parts]
+        count = int(round((stop - start) / step)) + 1
+
+        # Rounded to the decimal places written, so 0.1:0.5:0.1 gives 0.3 and not 0.30000000000000004
+        decimals = max(0, -min(decimal.Decimal(part.strip()).as_tuple().exponent for part in parts))
+        parsed_values = [round(start + index * step, decimals) for index in range(count)]
+    else:
+        parsed_values = []
+        for value in values.split(","):
+            try:
+                parsed_values.append(json.loads(value))
+            except json.JSONDecodeError:
+                parsed_values.append(value)
+
+    unique_values = {}
+    for value in parsed_values:
+        unique_values.setdefault(json.dumps(value), value)
+    return list(unique_values.values())
+
+
+def parse_axis(axis):
+    # TARGET=VALUES, the target is a setting such as _player_speed, an item stats column such as item:Coffee.stress,
+    # or a field of a timeline stage or event such as stage:Normal.spawn_rate or event:Recess.spawn_rate
+    target, values = axis.split("=", 1)
+    if not target.startswith("_") and target.split(":")[0] not in ("item", "stage", "event"):
+        raise ValueError(f"{target} is not a setting, item:NAME.COLUMN, stage:NAME.FIELD or event:NAME.FIELD")
+    return target, parse_values(values)
+
+
+def get_config_name(cell):
+    # Name of the results of a cell, values are written as JSON so that values such as 1 and "1" get different names
+    return ", ".join(f"{target}={json.dumps(value)}" for target, value in cell.items()) or "base"
+
+
+def get_changes(cell):
+    # Settings, item stats and timeline changes of a cell, a {target: value} dict
+    settings = {}
+    item_stats = {}
+    timeline = {}
+    for target, value in cell.items():
+        if target.startswith("_"):
+            settings[target] = value
+            continue
+        kind, path = target.split(":", 1)
+        name, field = path.rsplit(".", 1)
+        if kind == "item":
+            item_stats.setdefault(name, {})[field] = value
+        else:
+            timeline.setdefault(kind + "s", {}).setdefault(name, {})[field] = value
+    return settings, item_stats, timeline
+
+
+def get_code_version():
+    # Hash of the code and data files that decide the result of a game, so changing any of them runs every game again
+    data_files = game.AssetManifest(game.GameInitialisation(game.HeadlessBackend())).get_data_files()
+    version = hashlib.sha256()
+    for filename in [game.__file__, simulate.__file__] + data_files:
+        with open(filename, "rb") as f:
+            version.update(f.read())
+    return version.hexdigest()
+
+
+def get_key(job, code_version):
+    # Games with the same key always give the same result
+    key = {name: job[name] for name in ("policy", "character", "seed", "settings", "item_stats", "timeline")}
+    key["code_version"] = code_version
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """ SQLite file holding the result of every game already played, by the key of the game """
+    def __init__(self, filename):
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            "key TEXT PRIMARY KEY, code_version TEXT, config TEXT, seed INTEGER, "
+            "stress INTEGER, health INTEGER, grades INTEGER, levels TEXT)"
+        )
+        self._connection.commit()
+
+    # Getters
+    def get_results(self, code_version):
+        # {key: (final stats, levels)} of every game played with this version of the code
+        rows = self._connection.execute(
+            "SELECT key, stress, health, grades, levels FROM games WHERE code_version = ?", (code_version,)
+        )
+        return {
+            key: ({"Stress": stress, "Health": health, "Grades": grades}, json.loads(levels))
+            for key, stress, health, grades, levels in rows
+        }
+
+    # Functions
+    def add(self, key, code_version, job, final_stats, levels):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, code_version, job["config"], job["seed"], final_stats["Stress"], final_stats["Health"], final_stats["Grades"], json.dumps(levels))
+        )
+
+    def commit(self):
+        self._connection.commit()
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays simulated games for every combination of settings and keeps the results")
+    parser.add_argument("--axis", action="append", default=[], metavar="TARGET=VALUES",
+                        help="a setting or stat to try several values of, such as _player_speed=3,4,5 or item:Coffee.stress=-1:-3:-1")
+    parser.add_argument("--games", type=int, default=50, help="games played for each combination")
+    parser.add_argument("--policy", choices=sorted(simulate.POLICIES), default="random", help="how the simulated player moves")
+    parser.add_argument("--character", choices=["Male", "Female"], default="Male")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game of each combination")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of processes playing games")
+    parser.add_argument("--cache", default="sweep_cache.sqlite", help="file holding the results of games already played")
+    parser.add_argument("--output", default="sweep_results.json", help="file the summary of each combination is saved to")
+    args = parser.parse_args()
+
+    axes = [parse_axis(axis) for axis in args.axis]
+    targets = [target for target, values in axes]
+    cells = [dict(zip(targets, values)) for values in itertools.product(*[values for target, values in axes])]
+
+    # Every combination plays the same seeds
+    jobs = []
+    for cell in cells:
+        config_name = get_config_name(cell)
+        settings, item_stats, timeline = get_changes(cell)
+        jobs += simulate.make_jobs(config_name, args.policy, args.character, args.games, args.seed, None, settings, item_stats, timeline)
+
+    code_version = get_code_version()
+    keys = [get_key(job, code_version) for job in jobs]
+    cache = ResultCache(args.cache)
+    cached_results = cache.get_results(code_version)
+
+    # Only games not in the cache are played, each is saved as soon as it ends so a stopped sweep keeps its progress
+    new_jobs = [(key, job) for key, job in zip(keys, jobs) if key not in cached_results]
+    print(f"{len(cells)} combinations, {len(jobs)} games: {len(jobs) - len(new_jobs)} in the cache, {len(new_jobs)} to play")
+    start_time = time.perf_counter()
+    results = simulate.iter_jobs([job for key, job in new_jobs], args.workers)
+    for index, ((key, job), (config_name, final_stats, levels)) in enumerate(zip(new_jobs, results)):
+        cache.add(key, code_version, job, final_stats, levels)
+        cached_results[key] = (final_stats, levels)
+        if index % 20 == 19:
+            cache.commit()
+    cache.close()
+    if new_jobs:
+        print(f"Played {len(new_jobs)} games in {time.perf_counter() - start_time:.1f} seconds")
+
+    summary = simulate.summarise([(job["config"],) + cached_results[key] for key, job in zip(keys, jobs)])
+    simulate.print_summary(summary)
+    with open(args.output, "w") as f:
+        json.dump({
+            "policy": args.policy,
+            "games": args.games,
+            "axes": dict(axes),
+            "combinations": [{"values": cell, "summary": summary[get_config_name(cell)]} for cell in cells]
+        }, f, indent=2)
+    print(f"Summary saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
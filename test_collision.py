@@ -0,0 +1,129 @@
+"""
+Checks that the collision checks give the same results as the pixel range check used before they were sped up
+Run with: python -m unittest test_collision
+"""
+import random
+import unittest
+
+import game
+
+
+def check_collision(object1, object2):
+    # The original check, which looks for a shared pixel in the x and y ranges of the two objects
+    obj_1_x_range = range(int(object1.get_xcor() - object1.get_x_padding()), int(object1.get_xcor() + object1.get_x_padding() + 1))
+    obj_2_x_range = range(int(object2.get_xcor() - object2.get_x_padding()), int(object2.get_xcor() + object2.get_x_padding() + 1))
+    obj_1_y_range = range(int(object1.get_ycor() - object1.get_y_padding()), int(object1.get_ycor() + object1.get_y_padding() + 1))
+    obj_2_y_range = range(int(object2.get_ycor() - object2.get_y_padding()), int(object2.get_ycor() + object2.get_y_padding() + 1))
+    x_range_same = None
+    y_range_same = None
+
+    for i in obj_1_x_range:
+        if i in obj_2_x_range:
+            x_range_same = True
+            break
+    for j in obj_1_y_range:
+        if j in obj_2_y_range:
+            y_range_same = True
+            break
+
+    return bool(x_range_same and y_range_same)
+
+
+class Box:
+    """ A rectangle with the getters the collision checks read """
+    def __init__(self, xcor, ycor, x_padding, y_padding):
+        self._xcor = xcor
+        self._ycor = ycor
+        self._x_padding = x_padding
+        self._y_padding = y_padding
+
+    def get_xcor(self):
+        return self._xcor
+
+    def get_ycor(self):
+        return self._ycor
+
+    def get_x_padding(self):
+        return self._x_padding
+
+    def get_y_padding(self):
+        return self._y_padding
+
+
+class StoreController:
+    """ The parts of GameController used by ItemStore.check_collisions, recording the items collected """
+    def __init__(self, player):
+        self._player = player
+        self._collision_system = game.CollisionSystem()
+        self.collected = []
+
+    def get_player(self):
+        return self._player
+
+    def get_collision_system(self):
+        return self._collision_system
+
+    def collect_item(self, item):
+        self.collected.append(item)
+
+    def remove_item(self, item):
+        pass
+
+
+def random_box(rng):
+    # Mostly whole numbers like the game uses, with fractions and negative coordinates around zero to test the rounding
+    if rng.random() < 0.5:
+        xcor = rng.randint(-40, 40)
+        ycor = rng.randint(-40, 40)
+        x_padding = rng.randint(0, 20)
+        y_padding = rng.randint(0, 20)
+    else:
+        xcor = rng.uniform(-40, 40)
+        ycor = rng.uniform(-40, 40)
+        x_padding = rng.choice([0, 0.25, 0.5, rng.uniform(0, 20)])
+        y_padding = rng.choice([0, 0.25, 0.5, rng.uniform(0, 20)])
+    return Box(xcor, ycor, x_padding, y_padding)
+
+
+def random_item(rng, item_type):
+    box = random_box(rng)
+    changed_type = item_type.with_changes({"x-pad": box.get_x_padding(), "y-pad": box.get_y_padding()})
+    return game.Item(changed_type, box.get_xcor(), box.get_ycor(), 1, 800)
+
+
+class CollisionParityTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(1)
+        self.collision_system = game.CollisionSystem()
+        self.item_type = game.ItemType("Crate1", 10, 10, 0, 0, 0, 1)
+
+    def test_overlaps(self):
+        for i in range(20000):
+            box1 = random_box(self.rng)
+            box2 = random_box(self.rng)
+            self.assertEqual(self.collision_system.overlaps(box1, box2), check_collision(box1, box2))
+
+    def test_find_collisions(self):
+        for i in range(500):
+            player = random_box(self.rng)
+            items = [random_box(self.rng) for j in range(self.rng.randint(0, 30))]
+            expected = {item for item in items if check_collision(player, item)}
+            self.assertEqual(self.collision_system.find_collisions(player, items), expected)
+
+    def test_item_store(self):
+        # With an array threshold of 0 the arrays are used from the first item when NumPy is installed
+        for i in range(1000):
+            controller = StoreController(random_box(self.rng))
+            item_store = game.ItemStore(controller, 30, array_threshold=i % 2 * 32)
+            items = [random_item(self.rng, self.item_type) for j in range(self.rng.randint(0, 30))]
+            for item in items:
+                item_store.add(item)
+            item_store.check_collisions()
+
+            expected = [item for item in items if check_collision(controller.get_player(), item)]
+            self.assertEqual(controller.collected, expected)
+            self.assertEqual(item_store.get_items(), [item for item in items if item not in expected])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Checks that a recorded game replays to the same final stats and spawn checksum
+Run with: python -m unittest test_replay
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import game
+import simulate
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, "game.rpl")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def record_game(self, character, seed):
+        # Plays a headless game with a random walk player and saves it, returns the final stats and spawn checksum
+        controller = game.GameController(character, game.HeadlessBackend(), seed)
+        controller.set_policy(simulate.RandomWalkPolicy(seed))
+        controller.set_recorder(game.ReplayRecorder(self.filename))
+        final_stats = dict(controller.play())
+        return final_stats, controller.get_timeline_checksum()
+
+    def test_replay_file(self):
+        final_stats, checksum = self.record_game("Male", 3)
+        replay = game.ReplayPlayer(self.filename)
+        self.assertEqual(replay.get_seed(), 3)
+        self.assertEqual(replay.get_character(), "Male")
+        self.assertEqual(replay.get_final_stats(), final_stats)
+        self.assertEqual(replay.get_timeline_checksum(), checksum)
+
+        # The player moved, so the keys recorded are not all zero
+        key_masks = [replay.get_next_key_mask() for i in range(replay.get_tick_count())]
+        self.assertTrue(any(key_masks))
+        self.assertTrue(all(0 <= key_mask < 16 for key_mask in key_masks))
+
+    def test_run_replay(self):
+        for character, seed in (("Male", 1), ("Female", 2)):
+            self.record_game(character, seed)
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertTrue(game.run_replay(self.filename, game.HeadlessBackend()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Checks that a game carried on from a snapshot ends the same way as the game the snapshot was taken from
+Run with: python -m unittest test_snapshot
+"""
+import unittest
+
+import game
+import simulate
+
+
+# Items spawn often enough in the normal stage for the item store to keep its items in arrays when NumPy is installed
+DENSE_TIMELINE = {"stages": {"Normal": {"spawn_rate": 3}}}
+
+# Stats are capped at 30000 instead of 100 so that every item collected changes the final stats; snapshots hold up to 32767
+SETTINGS = {"_max_stat_value": 30000}
+
+
+class RecordingPolicy:
+    """ Moves like a random walk policy and keeps the key mask of every tick, so another game can hold the same keys """
+    def __init__(self, seed):
+        self._policy = simulate.RandomWalkPolicy(seed)
+        self.key_masks = {}
+
+    def get_key_mask(self, controller):
+        key_mask = self._policy.get_key_mask(controller)
+        self.key_masks[controller.get_frames()] = key_mask
+        return key_mask
+
+
+class ScriptedPolicy:
+    """ Holds the keys recorded by a RecordingPolicy on each tick """
+    def __init__(self, key_masks):
+        self._key_masks = key_masks
+
+    def get_key_mask(self, controller):
+        return self._key_masks[controller.get_frames()]
+
+
+def new_game(seed, policy):
+    controller = game.GameController("Female", game.HeadlessBackend(), seed)
+    controller.change_settings(SETTINGS)
+    controller.change_timeline(DENSE_TIMELINE)
+    controller.set_policy(policy)
+    return controller
+
+
+class SnapshotTest(unittest.TestCase):
+    def play_with_snapshot(self, seed, min_items):
+        # Plays a game, taking a snapshot once at least min_items items are alive, and returns the snapshot,
+        # the keys held on every tick and the final stats and spawn checksum
+        policy = RecordingPolicy(seed)
+        controller = new_game(seed, policy)
+        controller.set_up_game()
+        scheduler = controller.get_scheduler()
+        scheduler.start()
+        data = None
+        while scheduler.is_running():
+            scheduler.run_frame()
+            if data is None and controller.get_item_store().get_count() >= min_items:
+                if game.np is not None:
+                    self.assertTrue(controller.get_item_store().uses_arrays())
+                data = controller.save_snapshot()
+        self.assertIsNotNone(data, f"There were never {min_items} items alive")
+        return data, policy.key_masks, dict(controller.get_game_stats()), controller.get_timeline_checksum()
+
+    def test_resume(self):
+        for seed in range(2):
+            data, key_masks, final_stats, checksum = self.play_with_snapshot(seed, 40)
+
+            controller = new_game(seed, ScriptedPolicy(key_masks))
+            controller.set_snapshot(game.GameSnapshot(data))
+            self.assertEqual(dict(controller.play()), final_stats)
+            self.assertEqual(controller.get_timeline_checksum(), checksum)
+
+    def test_save_after_restore(self):
+        # A restored game saves the same snapshot it was restored from
+        data, key_masks, final_stats, checksum = self.play_with_snapshot(2, 40)
+        controller = new_game(2, ScriptedPolicy(key_masks))
+        controller.set_up_game()
+        controller.restore_snapshot(game.GameSnapshot(data))
+        self.assertEqual(controller.save_snapshot(), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Checks that spawn tables pick each item in proportion to its weight
+Run with: python -m unittest test_spawn_table
+"""
+import collections
+import random
+import unittest
+
+import game
+
+
+def make_items(weights):
+    return [game.ItemType(f"Item{index}", 10, 10, 0, 0, 0, 1, weight) for index, weight in enumerate(weights)]
+
+
+class SpawnTableTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(1)
+
+    def check_chances(self, weights):
+        table = game.SpawnTable(make_items(weights))
+        total = sum(weights)
+        for index, weight in enumerate(weights):
+            self.assertAlmostEqual(table.get_chance(index), weight / total, places=12, msg=f"weights {weights}")
+
+    def test_chances(self):
+        self.check_chances([1])
+        self.check_chances([1, 1, 1])
+        self.check_chances([1, 2, 3, 4])
+        self.check_chances([0, 1])
+        self.check_chances([5, 0, 1, 0, 2])
+        self.check_chances([0.5, 0.25, 0.25])
+        for i in range(500):
+            weights = [self.rng.choice([0, 1, 2, 3, 10, self.rng.uniform(0, 5)]) for j in range(self.rng.randint(1, 20))]
+            if sum(weights) > 0:
+                self.check_chances(weights)
+
+    def test_picks(self):
+        # Zero weight items are never picked, and the others are picked about as often as their weights say
+        weights = [3, 0, 1, 0, 6]
+        items = make_items(weights)
+        table = game.SpawnTable(items)
+        picks = collections.Counter(table.pick(self.rng) for i in range(100000))
+        self.assertEqual(picks[items[1]], 0)
+        self.assertEqual(picks[items[3]], 0)
+        for item, weight in zip(items, weights):
+            self.assertAlmostEqual(picks[item] / 100000, weight / sum(weights), delta=0.01)
+
+    def test_no_weight(self):
+        with self.assertRaises(ValueError):
+            game.SpawnTable(make_items([0, 0]))
+        with self.assertRaises(ValueError):
+            game.SpawnTable([])
+
+
+if __name__ == "__main__":
+    unittest.main()